@@ -1,11 +1,27 @@
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException
-from fastapi.responses import HTMLResponse, FileResponse
+from fastapi.responses import HTMLResponse, FileResponse, JSONResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
+from sse_starlette.sse import EventSourceResponse
+import asyncio
+import json
 import logging
 import os
+import threading
 import pandas as pd
-from chatbot import chatbot_response
+from chatbot import chatbot_response, chatbot_events, sessions, router
+import job_search
+import models
+import inference
+import tool_results
+import http_client
+import rate_limit
+from rate_limit import RateLimited
+from news import news_cache
+from quiz_pool import quiz_pool
+from quiz_history import quiz_history
+from resume_profile import resume_profiles
+from resume_vectors import resume_vectors
 from pdf_processor import process_pdf_resume
 
 # Configure logging
@@ -17,6 +33,16 @@ app = FastAPI()
 # Mount static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
+@app.on_event("startup")
+async def start_warm_up():
+    # Load models and the job index in the background so the server accepts
+    # requests right away; /readyz reports when search is ready
+    threading.Thread(target=job_search.warm_up, name="warm-up", daemon=True).start()
+
+@app.on_event("shutdown")
+async def close_http_clients():
+    await http_client.aclose_clients()
+
 class ChatRequest(BaseModel):
     user_id: str
     user_input: str
@@ -67,11 +93,68 @@ async def chat(request: ChatRequest):
     logger.info(f"Chat request received for user {request.user_id}")
     logger.info(f"User input: {request.user_input[:100]}...")
     
-    response = await chatbot_response(request.user_id, request.user_input)
+    openai_limiter = rate_limit.limiter("openai")
+    if openai_limiter.overloaded():
+        return overloaded_response(RateLimited("openai", openai_limiter.retry_after()))
+    try:
+        response = await chatbot_response(request.user_id, request.user_input)
+    except RateLimited as e:
+        return overloaded_response(e)
     
     logger.info(f"Chat response generated for user {request.user_id}")
     return ChatResponse(response=response)
 
+def overloaded_response(error: RateLimited) -> JSONResponse:
+    logger.warning(f"Shedding chat request: {error}")
+    retry_after = int(error.retry_after)
+    return JSONResponse({"detail": "The assistant is busy, please try again shortly.", "retry_after": retry_after},
+                        status_code=503, headers={"Retry-After": str(retry_after)})
+
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    logger.info(f"Streaming chat request received for user {request.user_id}")
+    openai_limiter = rate_limit.limiter("openai")
+    if openai_limiter.overloaded():
+        return overloaded_response(RateLimited("openai", openai_limiter.retry_after()))
+
+    async def events():
+        try:
+            async for event, data in chatbot_events(request.user_id, request.user_input):
+                yield {"event": event, "data": json.dumps(data)}
+        except RateLimited as e:
+            logger.warning(f"Shedding streaming chat request: {e}")
+            yield {"event": "error", "data": json.dumps(f"The assistant is busy, please try again in {int(e.retry_after)} seconds.")}
+        except Exception as e:
+            logger.error(f"Error streaming chat for user {request.user_id}: {str(e)}")
+            yield {"event": "error", "data": json.dumps("Sorry, there was an error processing your message.")}
+
+    return EventSourceResponse(events())
+
+@app.get("/healthz")
+async def healthz():
+    return {"status": "ok"}
+
+@app.get("/readyz")
+async def readyz():
+    ready = job_search.is_ready()
+    body = {"ready": ready, "models_loaded": models.models_loaded(), "model_load_seconds": models.load_seconds}
+    return JSONResponse(body, status_code=200 if ready else 503)
+
+@app.get("/metrics")
+async def metrics():
+    return {
+        "inference": inference.stats(),
+        "sessions": sessions.stats(),
+        "tool_results": tool_results.stats(),
+        "router": router.stats(),
+        "rate_limits": rate_limit.stats(),
+        "news_cache": news_cache.stats(),
+        "quiz_pool": quiz_pool.stats(),
+        "quiz_history": quiz_history.stats(),
+        "resume_profiles": resume_profiles.stats(),
+        "resume_vectors": resume_vectors.stats(),
+    }
+
 @app.post("/upload-resume", response_model=UploadResponse)
 async def upload_resume(user_id: str = Form(...), file: UploadFile = File(...)):
     logger.info(f"Resume upload request received for user {user_id}")
@@ -87,7 +170,8 @@ async def upload_resume(user_id: str = Form(...), file: UploadFile = File(...)):
         logger.info(f"PDF file read successfully, size: {len(pdf_bytes)} bytes")
         
         logger.info("Processing PDF resume")
-        success = process_pdf_resume(user_id, pdf_bytes)
+        # Extraction, profiling and embedding the resume block, so they run off the event loop
+        success = await asyncio.to_thread(process_pdf_resume, user_id, pdf_bytes)
         
         if success:
             logger.info(f"Resume processed successfully for user {user_id}")
@@ -0,0 +1,133 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import numpy as np
+
+DEFAULT_MESSAGES = [
+    "Find me remote backend engineering jobs",
+    "What's happening in the data science job market?",
+    "Quiz me on system design",
+]
+
+
+def post_chat(url: str, user_id: str, message: str, timeout: float) -> float:
+    """Seconds taken by one /chat request."""
+    body = json.dumps({"user_id": user_id, "user_input": message}).encode('utf-8')
+    request = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"})
+    start = time.perf_counter()
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        response.read()
+    return time.perf_counter() - start
+
+
+def run_level(url: str, users: int, rounds: int, messages, timeout: float) -> np.ndarray:
+    """Send `rounds` messages from each of `users` parallel users and return every request's latency."""
+    def user_session(user: int):
+        return [post_chat(url, f"bench-user-{user}", messages[(user + i) % len(messages)], timeout)
+                for i in range(rounds)]
+
+    with ThreadPoolExecutor(max_workers=users) as pool:
+        sessions = list(pool.map(user_session, range(users)))
+    return np.array([latency for session in sessions for latency in session])
+
+
+class _StubCompletions:
+    """Stands in for the OpenAI chat API: waits like a model, asks for one tool call, then answers."""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+
+    async def create(self, stream: bool = True, **kwargs):
+        await asyncio.sleep(self.delay)
+        if "tools" in kwargs:
+            call = SimpleNamespace(index=0, id="call_offline", function=SimpleNamespace(
+                name="find_jobs", arguments=json.dumps({"user_id": "offline", "text": "offline"})))
+            delta = SimpleNamespace(content=None, tool_calls=[call])
+        else:
+            delta = SimpleNamespace(content="Here you go.", tool_calls=None)
+        return _stream([SimpleNamespace(choices=[SimpleNamespace(delta=delta)])])
+
+
+async def _stream(chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+def offline_check(users: int, llm_delay: float, tool_delay: float, max_slowdown: float) -> bool:
+    """Time one chatbot_response against `users` parallel ones, with a stub model and a slow blocking tool.
+
+    Needs no server or API keys. Each turn makes two model calls and one tool
+    call that blocks its thread for `tool_delay` seconds, so if nothing blocks
+    the event loop the parallel turns take about as long as a single one.
+    """
+    os.environ.setdefault("OPENAI_API_KEY", "offline-check")
+    # Keep the rate limiter out of the measurement
+    for setting in ("RPS", "BURST", "MAX_CONCURRENT", "MAX_QUEUE"):
+        os.environ.setdefault(f"RATE_LIMIT_OPENAI_{setting}", "10000")
+    import chatbot
+
+    chatbot.client = SimpleNamespace(chat=SimpleNamespace(completions=_StubCompletions(llm_delay)))
+    chatbot.tool_functions["find_jobs"] = lambda args: time.sleep(tool_delay) or []
+
+    async def turns(count: int) -> float:
+        start = time.perf_counter()
+        # A message the router leaves to the (stub) model
+        await asyncio.gather(*(chatbot.chatbot_response(f"offline-user-{i}", "Hello, can you help me?")
+                               for i in range(count)))
+        return time.perf_counter() - start
+
+    single = asyncio.run(turns(1))
+    parallel = asyncio.run(turns(users))
+    slowdown = parallel / single
+    print(f"1 user: {single:.2f}s, {users} users: {parallel:.2f}s, slowdown {slowdown:.2f}x")
+    return slowdown <= max_slowdown
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure /chat latency as the number of parallel users grows.")
+    parser.add_argument("--url", default="http://127.0.0.1:8000/chat")
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 4, 16, 32])
+    parser.add_argument("--rounds", type=int, default=3, help="Messages sent by each user")
+    parser.add_argument("--message", action="append", help="Message to send (repeatable)")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--max-slowdown", type=float,
+                        help="Fail if p50 latency at the highest user count exceeds this multiple of the single-user p50")
+    parser.add_argument("--offline", action="store_true",
+                        help="Check without a server: stub model, slow blocking tool, parallel chatbot_response calls")
+    parser.add_argument("--llm-delay", type=float, default=0.5, help="Seconds each stub model call takes (--offline)")
+    parser.add_argument("--tool-delay", type=float, default=1.0, help="Seconds the stub tool blocks (--offline)")
+    args = parser.parse_args()
+
+    if args.offline:
+        users = max(args.users)
+        max_slowdown = args.max_slowdown if args.max_slowdown is not None else 1.5
+        if not offline_check(users, args.llm_delay, args.tool_delay, max_slowdown):
+            print(f"slowdown exceeded {max_slowdown:.2f}x")
+            sys.exit(1)
+        return
+
+    messages = args.message or DEFAULT_MESSAGES
+    print(f"{'users':>6} {'requests':>9} {'p50 s':>8} {'p95 s':>8} {'max s':>8}")
+    p50s = []
+    for users in args.users:
+        latencies = run_level(args.url, users, args.rounds, messages, args.timeout)
+        p50 = float(np.percentile(latencies, 50))
+        p50s.append(p50)
+        print(f"{users:>6} {len(latencies):>9} {p50:>8.2f} {np.percentile(latencies, 95):>8.2f} {latencies.max():>8.2f}")
+
+    slowdown = p50s[-1] / p50s[0]
+    print(f"p50 slowdown from {args.users[0]} to {args.users[-1]} users: {slowdown:.2f}x")
+    if args.max_slowdown is not None and slowdown > args.max_slowdown:
+        print(f"slowdown exceeded {args.max_slowdown:.2f}x")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
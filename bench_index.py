@@ -0,0 +1,88 @@
+import argparse
+import time
+from dataclasses import replace
+
+import faiss
+import numpy as np
+
+from job_index import IndexConfig, configure_search, create_index, effective_kind
+from vector_store import JobVectorStore
+
+
+def load_vectors(synthetic: int, dimension: int):
+    """Stored job vectors, or random unit vectors to try corpus sizes we don't have yet."""
+    if synthetic:
+        vectors = np.random.default_rng(0).standard_normal((synthetic, dimension)).astype('float32')
+        faiss.normalize_L2(vectors)
+        return np.arange(synthetic, dtype='int64'), vectors
+    return JobVectorStore().latest()
+
+
+def sample_queries(vectors: np.ndarray, count: int) -> np.ndarray:
+    """Perturbed copies of random corpus vectors, so queries look like real job/resume embeddings."""
+    rng = np.random.default_rng(1)
+    rows = rng.choice(len(vectors), min(count, len(vectors)), replace=False)
+    queries = np.asarray(vectors[rows], dtype='float32') + rng.normal(0, 0.05, (len(rows), vectors.shape[1])).astype('float32')
+    faiss.normalize_L2(queries)
+    return queries
+
+
+def benchmark(index, queries: np.ndarray, truth: np.ndarray, k: int):
+    latencies = []
+    hits = 0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        _, labels = index.search(query[None, :], k)
+        latencies.append(time.perf_counter() - start)
+        hits += len(set(labels[0].tolist()) & set(expected.tolist()))
+    latencies_ms = np.array(latencies) * 1000
+    return hits / (len(queries) * k), np.percentile(latencies_ms, 50), np.percentile(latencies_ms, 95)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare job index types by recall@k against a flat index and query latency.")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--types", nargs="+", default=["ivf_flat", "ivf_pq", "hnsw"])
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[4, 16, 64])
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[32, 64, 128])
+    parser.add_argument("--synthetic", type=int, default=0, help="Benchmark N random vectors instead of data/jobs.vectors")
+    parser.add_argument("--dimension", type=int, default=384, help="Dimension of synthetic vectors")
+    args = parser.parse_args()
+
+    vector_ids, vectors = load_vectors(args.synthetic, args.dimension)
+    if not len(vectors):
+        raise SystemExit("No stored job vectors; ingest jobs first or pass --synthetic N")
+    vectors = np.ascontiguousarray(vectors, dtype='float32')
+    queries = sample_queries(vectors, args.queries)
+    base = IndexConfig.from_env()
+
+    flat = create_index(vectors, vector_ids, replace(base, kind="flat"))
+    _, truth = flat.search(queries, args.k)
+    print(f"{len(vectors)} vectors, {len(queries)} queries, k={args.k}\n")
+    print(f"{'index':<10} {'param':<14} {'build s':>8} {'recall@k':>9} {'p50 ms':>8} {'p95 ms':>8}")
+
+    _, p50, p95 = benchmark(flat, queries, truth, args.k)
+    print(f"{'flat':<10} {'-':<14} {'-':>8} {1.0:>9.3f} {p50:>8.3f} {p95:>8.3f}")
+
+    for kind in args.types:
+        config = replace(base, kind=kind)
+        if effective_kind(config, len(vectors)) != kind:
+            print(f"{kind:<10} skipped: too few vectors to train")
+            continue
+        start = time.perf_counter()
+        index = create_index(vectors, vector_ids, config)
+        build_seconds = time.perf_counter() - start
+
+        if kind == "hnsw":
+            settings = [(f"efSearch={ef}", replace(config, ef_search=ef)) for ef in args.ef_search]
+        else:
+            settings = [(f"nprobe={nprobe}", replace(config, nprobe=nprobe)) for nprobe in args.nprobe]
+        for label, setting in settings:
+            configure_search(index, setting)
+            recall, p50, p95 = benchmark(index, queries, truth, args.k)
+            print(f"{kind:<10} {label:<14} {build_seconds:>8.2f} {recall:>9.3f} {p50:>8.3f} {p95:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
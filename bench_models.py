@@ -0,0 +1,93 @@
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.stats import spearmanr
+
+import models
+from job_search import JOBS_FILE, job_text
+
+
+def load_texts(corpus_size: int, agreement_jobs: int, query_count: int):
+    """A sample of job texts from data/jobs.csv, the same repeated up to corpus_size, and job titles as queries."""
+    jobs = pd.read_csv(JOBS_FILE)
+    if jobs.empty:
+        raise SystemExit(f"No jobs in {JOBS_FILE}")
+    jobs = jobs.sample(min(agreement_jobs, len(jobs)), random_state=0).to_dict('records')
+    texts = [job_text(job) for job in jobs]
+    queries = sorted({str(job['job_title']) for job in jobs})[:query_count]
+    repeated = (texts * (corpus_size // len(texts) + 1))[:max(corpus_size, len(texts))]
+    return texts, repeated, queries
+
+
+def throughput(fn, items, batch_size: int) -> float:
+    fn(items[:batch_size])  # warm-up
+    start = time.perf_counter()
+    for i in range(0, len(items), batch_size):
+        fn(items[i:i + batch_size])
+    return len(items) / (time.perf_counter() - start)
+
+
+def top_k_agreement(baseline: np.ndarray, candidate: np.ndarray, k: int) -> float:
+    """Mean overlap of the top-k job sets per query between two score matrices (queries x jobs)."""
+    k = min(k, baseline.shape[1])
+    overlaps = [
+        len(set(np.argsort(-b)[:k]) & set(np.argsort(-c)[:k])) / k
+        for b, c in zip(baseline, candidate)
+    ]
+    return float(np.mean(overlaps))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare model backends by encode/rerank throughput and ranking agreement with torch fp32.")
+    parser.add_argument("--backends", nargs="+", default=list(models.MODEL_BACKENDS))
+    parser.add_argument("--corpus-size", type=int, default=512, help="Texts encoded/scored for the throughput numbers")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--agreement-jobs", type=int, default=200, help="Jobs sampled for the agreement check")
+    parser.add_argument("--queries", type=int, default=20, help="Job titles used as queries for the agreement check")
+    parser.add_argument("--min-agreement", type=float, default=0.9,
+                        help="Fail if top-k overlap or rerank Spearman correlation with fp32 drops below this")
+    args = parser.parse_args()
+
+    texts, corpus, queries = load_texts(args.corpus_size, args.agreement_jobs, args.queries)
+    pairs = [[query, text] for query in queries for text in texts]
+    corpus_pairs = [[queries[i % len(queries)], text] for i, text in enumerate(corpus)]
+
+    baseline_bi = models.load_bi_encoder("torch")
+    baseline_cross = models.load_cross_encoder("torch")
+    job_vectors = baseline_bi.encode(texts, normalize_embeddings=True)
+    query_vectors = baseline_bi.encode(queries, normalize_embeddings=True)
+    baseline_retrieval = query_vectors @ job_vectors.T
+    baseline_rerank = np.asarray(baseline_cross.predict(pairs))
+
+    print(f"{len(texts)} jobs, {len(queries)} queries, throughput over {len(corpus)} texts\n")
+    print(f"{'backend':<12} {'encode/s':>10} {'rerank/s':>10} {'top-k agree':>12} {'rerank rho':>11}")
+
+    failed = False
+    for backend in args.backends:
+        try:
+            bi_encoder = baseline_bi if backend == "torch" else models.load_bi_encoder(backend)
+            cross_encoder = baseline_cross if backend == "torch" else models.load_cross_encoder(backend)
+        except Exception as e:
+            print(f"{backend:<12} unavailable: {e}")
+            continue
+
+        encode_rate = throughput(lambda batch: bi_encoder.encode(batch, batch_size=args.batch_size), corpus, args.batch_size)
+        rerank_rate = throughput(lambda batch: cross_encoder.predict(batch, batch_size=args.batch_size), corpus_pairs, args.batch_size)
+
+        retrieval = bi_encoder.encode(queries, normalize_embeddings=True) @ bi_encoder.encode(texts, normalize_embeddings=True).T
+        agreement = top_k_agreement(baseline_retrieval, retrieval, args.k)
+        rho = spearmanr(baseline_rerank, np.asarray(cross_encoder.predict(pairs))).correlation
+
+        ok = agreement >= args.min_agreement and rho >= args.min_agreement
+        failed |= not ok
+        print(f"{backend:<12} {encode_rate:>10.1f} {rerank_rate:>10.1f} {agreement:>12.3f} {rho:>11.3f}{'' if ok else '  BELOW THRESHOLD'}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import argparse
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+
+def wait_for(url: str, started: float, timeout: float):
+    """Seconds from `started` until url answers 200, or None on timeout."""
+    while time.perf_counter() - started < timeout:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return time.perf_counter() - started
+        except (urllib.error.URLError, ConnectionError, TimeoutError):
+            pass
+        time.sleep(0.05)
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure API import time, time to /healthz and time to /readyz.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--max-import-seconds", type=float, help="Fail if importing api takes longer")
+    parser.add_argument("--max-healthy-seconds", type=float, help="Fail if /healthz takes longer to answer")
+    parser.add_argument("--max-ready-seconds", type=float, help="Fail if /readyz takes longer to answer")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "import api"], check=True)
+    import_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "api:app", "--port", str(args.port), "--log-level", "warning"])
+    try:
+        base = f"http://127.0.0.1:{args.port}"
+        healthy_seconds = wait_for(f"{base}/healthz", start, args.timeout)
+        ready_seconds = wait_for(f"{base}/readyz", start, args.timeout)
+    finally:
+        server.terminate()
+        server.wait()
+
+    def show(seconds):
+        return f"{seconds:.2f}s" if seconds is not None else "timed out"
+
+    print(f"import api:      {import_seconds:.2f}s")
+    print(f"/healthz ready:  {show(healthy_seconds)}")
+    print(f"/readyz ready:   {show(ready_seconds)}")
+
+    failed = False
+    for seconds, limit, name in ((import_seconds, args.max_import_seconds, "import"),
+                                 (healthy_seconds, args.max_healthy_seconds, "/healthz"),
+                                 (ready_seconds, args.max_ready_seconds, "/readyz")):
+        if limit is not None and (seconds is None or seconds > limit):
+            print(f"{name} exceeded {limit:.2f}s")
+            failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,10 @@
+import threading
 from typing import List
 from mcp.server.fastmcp import FastMCP
 from quiz import generate_quiz_questions
+from quiz_pool import quiz_pool
 from news import search_job_news as search_news
-from job_search import search_jobs
+from job_search import search_jobs, warm_up
 
 mcp = FastMCP("career-agent-tools")
 
@@ -15,6 +17,9 @@ async def fetch_quiz_questions(
     past_qs: List[str],
 ) -> List[str]:
     """Return interview practice questions. Uses user_id + text for personalization."""
+    pooled = quiz_pool.take(user_id, role, resume, past_questions=past_qs)
+    if pooled:
+        return pooled
     return generate_quiz_questions(user_id=user_id, resume=resume, role=role, past_questions=past_qs)
 
 @mcp.tool()
@@ -32,15 +37,30 @@ async def find_jobs(
     text: str,
     query: str = None,
     top_k: int = 5,
+    location: str = None,
+    remote_only: bool = False,
+    min_salary: float = None,
+    max_salary: float = None,
+    posted_within_days: int = None,
 ) -> List[dict]:
-    """Search for job opportunities based on user resume or query."""
-    return search_jobs(user_id=user_id, query=query, top_k=top_k)
+    """Search for job opportunities based on user resume or query, optionally filtered by location, salary and posting date."""
+    return search_jobs(
+        user_id=user_id,
+        query=query,
+        top_k=top_k,
+        location=location,
+        remote_only=remote_only,
+        min_salary=min_salary,
+        max_salary=max_salary,
+        posted_within_days=posted_within_days,
+    )
 
 if __name__ == "__main__":
     import asyncio
     from mcp.server import stdio
 
     async def run():
+        threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
         async with stdio.stdio_server() as (read, write):
             await mcp.run(read, write)
 
@@ -1,19 +1,39 @@
 import asyncio
-from openai import OpenAI
+from concurrent.futures import ThreadPoolExecutor
+from openai import AsyncOpenAI
 from dotenv import load_dotenv
 load_dotenv()
 import os
 import json
 import logging
-from quiz import generate_quiz_questions
-from news import search_job_news as search_news
-from job_search import search_jobs
+import time
+import uuid
+from quiz import agenerate_quiz_questions
+from news import asearch_job_news as search_news
+from job_search import search_jobs, save_jobs_shown, query_encoder
+from intent_router import IntentRouter
+from sessions import SessionConfig, create_session_store
+from tool_results import clean, format_tool_result
+from rate_limit import limiter
+from quiz_pool import quiz_pool
+from resume_profile import user_resume_profile
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+# Blocking tools (job search runs model inference) run on this bounded pool so
+# the event loop keeps serving other users meanwhile
+TOOL_WORKERS = int(os.getenv("TOOL_WORKERS", 16))
+tool_executor = ThreadPoolExecutor(max_workers=TOOL_WORKERS, thread_name_prefix="tool")
+
+# Seconds a tool may run before the model gets a timeout error in its place
+TOOL_TIMEOUT_SECONDS = float(os.getenv("TOOL_TIMEOUT_SECONDS", 30))
+TOOL_TIMEOUTS = {
+    "fetch_quiz_questions": float(os.getenv("QUIZ_TOOL_TIMEOUT_SECONDS", 60)),
+}
 
 
 # Enhanced tool definitions with better context guidance
@@ -97,6 +117,26 @@ tools = [
                     "top_k": {
                         "type": "integer", 
                         "description": "Number of jobs to return"
+                    },
+                    "location": {
+                        "type": "string",
+                        "description": "Only jobs whose location contains this text, e.g. 'San Francisco' or 'Remote'"
+                    },
+                    "remote_only": {
+                        "type": "boolean",
+                        "description": "Only remote jobs"
+                    },
+                    "min_salary": {
+                        "type": "number",
+                        "description": "Minimum yearly salary in dollars, e.g. 120000 for 'over 120k'"
+                    },
+                    "max_salary": {
+                        "type": "number",
+                        "description": "Maximum yearly salary in dollars"
+                    },
+                    "posted_within_days": {
+                        "type": "integer",
+                        "description": "Only jobs posted in the last N days, e.g. 7 for 'this week'"
                     }
                 },
                 "required": ["user_id", "text"]
@@ -105,17 +145,182 @@ tools = [
     }
 ]
 
-user_histories = {}
+sessions = create_session_store(SessionConfig.from_env())
+router = IntentRouter(encode=query_encoder)
+SESSION_SAVE_ATTEMPTS = 5
 
 
-async def chatbot_response(user_id: str, user_input: str) -> str:
-    """Main chatbot function: handles user-level history and tool use."""
+def read_resume(user_id: str) -> str:
+    # The compact profile built at upload, not the raw PDF extraction
+    profile = user_resume_profile(user_id)
+    return profile.prompt_text() if profile else ""
+
+
+async def fetch_quiz_questions(args: dict):
+    resume = await asyncio.to_thread(read_resume, args["user_id"])
+
+    # Served from the pool, or on a miss from the refill it starts; the API is
+    # called directly only if that refill fails or comes back short
+    pooled = await asyncio.to_thread(quiz_pool.take, args["user_id"], args["role"], resume,
+                                     past_questions=args.get("past_qs"))
+    if pooled:
+        logger.info(f"Served quiz questions for user {args['user_id']}, role: {args['role']} from the pool")
+        return pooled
+
+    logger.info(f"Generating quiz questions for user {args['user_id']}, role: {args['role']}")
+    return await agenerate_quiz_questions(
+        user_id=args["user_id"], 
+        resume=resume, 
+        role=args["role"], 
+        # The user's stored history is added to these by the quiz module
+        past_questions=args.get("past_qs")
+    )
+
+
+async def fetch_job_news(args: dict):
+    logger.info(f"Searching job news for user {args['user_id']}, topic: {args['topic']}")
+    return await search_news(topic=args["topic"], user_id=args["user_id"])
+
+
+def find_jobs(args: dict):
+    logger.info(f"Searching jobs for user {args['user_id']}, query: {args.get('query')}")
+    return search_jobs(
+        user_id=args["user_id"],
+        query=args.get("query"),
+        top_k=args.get("top_k", 5),
+        location=args.get("location"),
+        remote_only=args.get("remote_only", False),
+        min_salary=args.get("min_salary"),
+        max_salary=args.get("max_salary"),
+        posted_within_days=args.get("posted_within_days"),
+        # Recorded by run_tool_call once the search has finished in time
+        record_shown=False
+    )
+
+
+tool_functions = {
+    "fetch_quiz_questions": fetch_quiz_questions,
+    "search_job_news": fetch_job_news,
+    "find_jobs": find_jobs,
+}
+
+
+async def run_tool(func_name: str, args: dict):
+    """Run a tool without blocking the event loop.
+
+    Tools that only wait on HTTP are coroutines and run on the loop itself (a
+    timeout then cancels the request); the rest run on the tool pool.
+    """
+    func = tool_functions.get(func_name)
+    if func is None:
+        logger.warning(f"Unknown function called: {func_name}")
+        return "Unknown function"
+    if asyncio.iscoroutinefunction(func):
+        return await func(args)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(tool_executor, func, args)
+
+
+async def run_tool_call(call: dict):
+    """Run one model tool call, turning a timeout or failure into an error result for the model.
+
+    Returns the tool message for the history, holding the compact form of the
+    result, and the full result for the UI.
+    """
+    func_name = call["function"]["name"]
+    timeout = TOOL_TIMEOUTS.get(func_name, TOOL_TIMEOUT_SECONDS)
+    try:
+        args = json.loads(call["function"]["arguments"])
+        logger.info(f"Calling tool: {func_name} with OpenAI-generated args: {args}")
+        # On timeout the await is cancelled; a tool on the pool finishes on its
+        # own and its result is dropped
+        result = await asyncio.wait_for(run_tool(func_name, args), timeout)
+        if func_name == "find_jobs" and isinstance(result, list):
+            # Only jobs the user is actually sent count as shown; a search that
+            # timed out finishes on the pool without hiding its results
+            await asyncio.to_thread(save_jobs_shown, args["user_id"],
+                                    [job["job_id"] for job in result if isinstance(job, dict) and "job_id" in job])
+        content = format_tool_result(func_name, result)
+        logger.info(f"Tool {func_name} completed successfully")
+    except asyncio.TimeoutError:
+        logger.warning(f"Tool {func_name} timed out after {timeout:.0f}s")
+        result = {"error": "timeout", "tool": func_name,
+                  "message": f"{func_name} did not finish within {timeout:.0f} seconds"}
+        content = json.dumps(result)
+    except Exception as e:
+        logger.exception(f"Tool {func_name} failed")
+        result = {"error": type(e).__name__, "tool": func_name, "message": str(e)}
+        content = json.dumps(result)
+
+    return {"role": "tool", "tool_call_id": call["id"], "content": content}, result
+
+
+# Shown to the user while a tool runs
+TOOL_PROGRESS = {
+    "fetch_quiz_questions": "Generating quiz…",
+    "search_job_news": "Searching news…",
+    "find_jobs": "Searching jobs…",
+}
+
+
+async def stream_completion(message: dict, user_id: str, **kwargs):
+    """Stream a chat completion, yielding its text as it arrives.
+
+    The assistant message, including any tool calls assembled from the
+    streamed deltas, is built up in `message`. The call holds an OpenAI rate
+    limiter slot, queued fairly with other users', until the stream ends.
+    """
+    content = []
+    tool_calls = {}
+    async with limiter("openai").aslot(user_id):
+        stream = await client.chat.completions.create(stream=True, **kwargs)
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta
+            if delta.content:
+                content.append(delta.content)
+                yield delta.content
+            for call in delta.tool_calls or []:
+                entry = tool_calls.setdefault(call.index, {"id": None, "type": "function", "function": {"name": "", "arguments": ""}})
+                if call.id:
+                    entry["id"] = call.id
+                if call.function and call.function.name:
+                    entry["function"]["name"] += call.function.name
+                if call.function and call.function.arguments:
+                    entry["function"]["arguments"] += call.function.arguments
+    message["role"] = "assistant"
+    message["content"] = "".join(content) or None
+    if tool_calls:
+        message["tool_calls"] = [tool_calls[index] for index in sorted(tool_calls)]
+
+
+def save_turn(user_id: str, history: list, turn_start: int, version: int):
+    """Save a finished turn, replaying it onto the latest history if another turn saved first."""
+    turn = history[turn_start:]
+    for _ in range(SESSION_SAVE_ATTEMPTS):
+        if sessions.save(user_id, history, version):
+            return
+        logger.info(f"Session for user {user_id} changed during this turn, reapplying it")
+        latest, version = sessions.load(user_id)
+        history = (latest if latest is not None else history[:turn_start]) + turn
+    logger.warning(f"Could not save turn for user {user_id} after {SESSION_SAVE_ATTEMPTS} attempts")
+
+
+async def chatbot_events(user_id: str, user_input: str):
+    """Main chatbot function: handles user-level history and tool use.
+
+    Yields ("progress", text) while tools run, ("tool_result", {"tool", "result"})
+    with each tool's full result, ("token", text) as the reply is generated, and
+    finally ("done", reply).
+    """
     logger.info(f"Processing request for user {user_id}: {user_input[:50]}...")
 
-    if user_id not in user_histories:
+    history, version = await asyncio.to_thread(sessions.load, user_id)
+    if history is None:
         logger.info(f"Creating new conversation history for user {user_id}")
         # Include user_id in the system prompt
-        user_histories[user_id] = [
+        history = [
             {"role": "system", "content": f"""You are a helpful career assistant with access to specialized tools. 
 
 CURRENT USER: {user_id}
@@ -138,7 +343,7 @@ Examples:
 """}
         ]
 
-    history = user_histories[user_id]
+    turn_start = len(history)
     history.append({"role": "user", "content": user_input})
 
     # Check for quiz-related keywords and add context
@@ -150,91 +355,79 @@ Examples:
         # Add user context to help with tool calling
         history[-1]["content"] += f" [User ID for tool calls: {user_id}]"
 
-    logger.info("Calling OpenAI API with tools enabled")
-    response = client.chat.completions.create(
-        model="gpt-4o",
-        messages=history,
-        tools=tools,
-        tool_choice="auto",
-        temperature=0.3
-    )
+    started = time.perf_counter()
+    intent = await asyncio.to_thread(router.route, user_input)
+    if intent is not None:
+        # Clear-cut request: call its tool directly instead of asking the model which one
+        logger.info(f"Routed to {intent.tool} by {intent.method} with args {intent.args}")
+        path = f"fast_{intent.method}"
+        args = {"user_id": user_id, "text": user_input, **intent.args}
+        if intent.tool == "fetch_quiz_questions":
+            args["past_qs"] = []
+        message = {
+            "role": "assistant",
+            "content": None,
+            "tool_calls": [{
+                "id": f"call_{uuid.uuid4().hex[:24]}",
+                "type": "function",
+                "function": {"name": intent.tool, "arguments": json.dumps(args)}
+            }]
+        }
+    else:
+        logger.info("Calling OpenAI API with tools enabled")
+        path = "llm"
+        message = {}
+        async for text in stream_completion(
+            message,
+            user_id,
+            model="gpt-4o",
+            messages=history,
+            tools=tools,
+            tool_choice="auto",
+            temperature=0.3
+        ):
+            yield "token", text
 
-    message = response.choices[0].message
-
-    if message.tool_calls:
-        logger.info(f"OpenAI requested {len(message.tool_calls)} tool call(s)")
-        
-        history.append({
-            "role": "assistant", 
-            "content": message.content,
-            "tool_calls": [
-                {
-                    "id": call.id,
-                    "type": "function", 
-                    "function": {
-                        "name": call.function.name,
-                        "arguments": call.function.arguments
-                    }
-                } for call in message.tool_calls
-            ]
-        })
-        
-        for call in message.tool_calls:
-            func_name = call.function.name
-            args = json.loads(call.function.arguments)
-            logger.info(f"Calling tool: {func_name} with OpenAI-generated args: {args}")
-            
-            if func_name == "fetch_quiz_questions":
-                # Fetch resume from file
-                resume_file = f"data/resumes/{args['user_id']}.txt"
-                try:
-                    with open(resume_file, 'r') as f:
-                        resume = f.read().strip()
-                except FileNotFoundError:
-                    resume = ""
-                
-                logger.info(f"Generating quiz questions for user {args['user_id']}, role: {args['role']}")
-                result = generate_quiz_questions(
-                    user_id=args["user_id"], 
-                    resume=resume, 
-                    role=args["role"], 
-                    past_questions=args["past_qs"]
-                )
-            elif func_name == "search_job_news":
-                logger.info(f"Searching job news for user {args['user_id']}, topic: {args['topic']}")
-                result = search_news(topic=args["topic"], user_id=args["user_id"])
-            elif func_name == "find_jobs":
-                logger.info(f"Searching jobs for user {args['user_id']}, query: {args.get('query')}")
-                result = search_jobs(user_id=args["user_id"], query=args.get("query"), top_k=args.get("top_k", 5))
-            else:
-                logger.warning(f"Unknown function called: {func_name}")
-                result = "Unknown function"
-            
-            logger.info(f"Tool {func_name} completed successfully")
-            
-            history.append({
-                "role": "tool", 
-                "tool_call_id": call.id, 
-                "content": str(result)
-            })
+    if message.get("tool_calls"):
+        logger.info(f"OpenAI requested {len(message['tool_calls'])} tool call(s)")
+
+        for call in message["tool_calls"]:
+            yield "progress", TOOL_PROGRESS.get(call["function"]["name"], "Working…")
+
+        # Independent tool calls run side by side; gather keeps them in tool_call_id order
+        results = await asyncio.gather(*(run_tool_call(call) for call in message["tool_calls"]))
+        history.append(message)
+        history.extend(tool_message for tool_message, _ in results)
+        for call, (_, result) in zip(message["tool_calls"], results):
+            yield "tool_result", {"tool": call["function"]["name"], "result": clean(result)}
 
         logger.info("Getting final response after tool execution")
-        final_response = client.chat.completions.create(
+        message = {}
+        async for text in stream_completion(
+            message,
+            user_id,
             model="gpt-4o",
             messages=history,
             temperature=0.7
-        )
-        
-        final_reply = final_response.choices[0].message.content
-        history.append({"role": "assistant", "content": final_reply})
-        
-        return final_reply
+        ):
+            yield "token", text
 
     else:
         logger.info("No tools called, returning direct response")
-        reply = message.content
-        history.append({"role": "assistant", "content": reply})
-        return reply
+
+    history.append(message)
+    router.record(path, time.perf_counter() - started)
+    await asyncio.to_thread(save_turn, user_id, history, turn_start, version)
+    yield "done", message["content"]
+
+
+async def chatbot_response(user_id: str, user_input: str) -> str:
+    """Reply to a user message in one piece."""
+    reply = None
+    async for event, data in chatbot_events(user_id, user_input):
+        if event == "done":
+            reply = data
+    return reply
 
 
 async def main():
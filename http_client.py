@@ -0,0 +1,137 @@
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+import weakref
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+PERPLEXITY_BASE_URL = os.getenv("PERPLEXITY_BASE_URL", "https://api.perplexity.ai").rstrip("/")
+PERPLEXITY_CHAT_URL = f"{PERPLEXITY_BASE_URL}/chat/completions"
+
+CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", 5))
+READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", 60))
+MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", 3))
+BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", 0.5))
+BACKOFF_CAP = float(os.getenv("HTTP_BACKOFF_CAP", 20))
+POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", 32))
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_session = None
+_session_lock = threading.Lock()
+# Keyed on the loop itself, so a finished loop's entry goes with it instead of
+# lingering (or being handed to a new loop that reuses its id)
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+
+def get_session() -> requests.Session:
+    """The process-wide requests session; its pool keeps connections alive between calls."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_SIZE)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """An httpx client for the running event loop, shared by every coroutine on it."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_connections=POOL_SIZE, max_keepalive_connections=POOL_SIZE),
+        )
+        _async_clients[loop] = client
+    return client
+
+
+async def aclose_clients():
+    """Close the running loop's httpx client and the requests session; called on app shutdown."""
+    global _session
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+    with _session_lock:
+        session, _session = _session, None
+    if session is not None:
+        session.close()
+
+
+def retry_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """Seconds to wait before retry number `attempt` (from 0).
+
+    A Retry-After header (seconds or an HTTP date) is honoured up to BACKOFF_CAP;
+    otherwise the delay is exponential with full jitter, so clients that failed
+    together don't retry together.
+    """
+    if retry_after:
+        try:
+            seconds = float(retry_after)
+        except ValueError:
+            try:
+                seconds = parsedate_to_datetime(retry_after).timestamp() - time.time()
+            except (TypeError, ValueError):
+                seconds = None
+        if seconds is not None:
+            return min(max(seconds, 0.0), BACKOFF_CAP)
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+
+def post_json(url: str, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None,
+              max_retries: int = MAX_RETRIES) -> requests.Response:
+    """POST a JSON body through the pooled session, retrying 429/5xx answers and connection failures.
+
+    The last response is returned whatever its status, so callers keep their
+    own handling of error answers; a connection failure or timeout on the last
+    attempt is raised.
+    """
+    session = get_session()
+    for attempt in range(max_retries + 1):
+        try:
+            response = session.post(url, json=payload, headers=headers, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if attempt == max_retries:
+                raise
+            delay = retry_delay(attempt)
+            logger.warning(f"POST {url} failed ({e}), retrying in {delay:.1f}s")
+        else:
+            if response.status_code not in RETRY_STATUSES or attempt == max_retries:
+                return response
+            delay = retry_delay(attempt, response.headers.get("Retry-After"))
+            logger.warning(f"POST {url} returned {response.status_code}, retrying in {delay:.1f}s")
+        time.sleep(delay)
+
+
+async def apost_json(url: str, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None,
+                     max_retries: int = MAX_RETRIES) -> httpx.Response:
+    """Async post_json on the shared httpx client; waiting between retries doesn't block the event loop."""
+    client = get_async_client()
+    for attempt in range(max_retries + 1):
+        try:
+            response = await client.post(url, json=payload, headers=headers)
+        except httpx.TransportError as e:
+            if attempt == max_retries:
+                raise
+            delay = retry_delay(attempt)
+            logger.warning(f"POST {url} failed ({e!r}), retrying in {delay:.1f}s")
+        else:
+            if response.status_code not in RETRY_STATUSES or attempt == max_retries:
+                return response
+            delay = retry_delay(attempt, response.headers.get("Retry-After"))
+            logger.warning(f"POST {url} returned {response.status_code}, retrying in {delay:.1f}s")
+        await asyncio.sleep(delay)
+
@@ -0,0 +1,90 @@
+import csv
+import logging
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import List, Set
+
+import numpy as np
+
+from job_index import job_vector_id
+
+IMPRESSIONS_DB = Path("data/impressions.db")
+LEGACY_JOBS_SHOWN_FILE = Path("data/jobs_shown.csv")
+
+logger = logging.getLogger(__name__)
+
+
+class ImpressionStore:
+    """Which jobs each user has already been shown, in SQLite keyed on (user_id, job_id).
+
+    Lookups read only the requesting user's rows through the primary key, and a
+    search records all of its results in one transaction. The database runs in
+    WAL mode so searches in other threads and workers keep reading while one writes.
+    """
+
+    def __init__(self, db_file: Path = IMPRESSIONS_DB, legacy_csv: Path = LEGACY_JOBS_SHOWN_FILE):
+        self.db_file = db_file
+        self.legacy_csv = legacy_csv
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            self.db_file.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.db_file, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        if not self._initialized:
+            with self._init_lock:
+                if not self._initialized:
+                    self._create_schema(conn)
+                    self._initialized = True
+        return conn
+
+    def _create_schema(self, conn: sqlite3.Connection):
+        with conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS impressions (
+                    user_id TEXT NOT NULL,
+                    job_id TEXT NOT NULL,
+                    vector_id INTEGER NOT NULL,
+                    shown_at TEXT NOT NULL,
+                    PRIMARY KEY (user_id, job_id)
+                ) WITHOUT ROWID
+            """)
+        empty = conn.execute("SELECT 1 FROM impressions LIMIT 1").fetchone() is None
+        if empty and self.legacy_csv.exists():
+            self._import_legacy_csv(conn)
+
+    def _import_legacy_csv(self, conn: sqlite3.Connection):
+        with open(self.legacy_csv, 'r', newline='') as f:
+            rows = [
+                (row['user_id'], row['job_id'], job_vector_id(row['job_id']), row['timestamp'])
+                for row in csv.DictReader(f)
+            ]
+        with conn:
+            conn.executemany("INSERT OR IGNORE INTO impressions VALUES (?, ?, ?, ?)", rows)
+        logger.info(f"Imported {len(rows)} impressions from {self.legacy_csv}")
+
+    def shown_job_ids(self, user_id: str) -> Set[str]:
+        rows = self._connection().execute("SELECT job_id FROM impressions WHERE user_id = ?", (user_id,))
+        return {job_id for (job_id,) in rows}
+
+    def shown_vector_ids(self, user_id: str) -> np.ndarray:
+        rows = self._connection().execute("SELECT vector_id FROM impressions WHERE user_id = ?", (user_id,))
+        return np.fromiter((vector_id for (vector_id,) in rows), dtype='int64')
+
+    def record(self, user_id: str, job_ids: List[str]):
+        """Mark jobs as shown to a user, in a single transaction."""
+        if not job_ids:
+            return
+        timestamp = datetime.now().isoformat()
+        rows = [(user_id, job_id, job_vector_id(job_id), timestamp) for job_id in job_ids]
+        conn = self._connection()
+        with conn:
+            conn.executemany("INSERT OR REPLACE INTO impressions VALUES (?, ?, ?, ?)", rows)
@@ -0,0 +1,136 @@
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH_SIZE = int(os.getenv("INFERENCE_MAX_BATCH_SIZE", 64))
+MAX_WAIT_MS = float(os.getenv("INFERENCE_MAX_WAIT_MS", 5))
+STATS_WINDOW = 1000
+
+_batchers: Dict[str, "MicroBatcher"] = {}
+
+
+class MicroBatcher:
+    """Runs model calls from concurrent callers as shared batches.
+
+    Each caller submits a list of inputs and blocks on a future. A background
+    thread takes the first waiting request, keeps collecting more until
+    `max_batch_size` inputs are queued or `max_wait_ms` has passed, then calls
+    `fn` once on all of them and hands each caller its slice of the output.
+    """
+
+    def __init__(self, name: str, fn: Callable[[List[Any]], Sequence[Any]],
+                 max_batch_size: int = MAX_BATCH_SIZE, max_wait_ms: float = MAX_WAIT_MS):
+        self.name = name
+        self.fn = fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._batch_sizes = deque(maxlen=STATS_WINDOW)
+        self._run_ms = deque(maxlen=STATS_WINDOW)
+        self._wait_ms = deque(maxlen=STATS_WINDOW)
+        self.batches = 0
+        self.items = 0
+        _batchers[name] = self
+
+    def __call__(self, inputs: List[Any]) -> Sequence[Any]:
+        return self.submit(inputs).result()
+
+    def submit(self, inputs: List[Any]) -> Future:
+        future = Future()
+        if not inputs:
+            future.set_result([])
+            return future
+        self._ensure_thread()
+        self._queue.put((list(inputs), future, time.perf_counter()))
+        return future
+
+    def _ensure_thread(self):
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name=f"batcher-{self.name}", daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            requests = [self._queue.get()]
+            size = len(requests[0][0])
+            deadline = time.perf_counter() + self.max_wait
+            while size < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                requests.append(request)
+                size += len(request[0])
+            self._run_batch(requests)
+
+    def _run_batch(self, requests):
+        inputs = [item for request_inputs, _, _ in requests for item in request_inputs]
+        started = time.perf_counter()
+        try:
+            outputs = self.fn(inputs)
+        except Exception as e:
+            logger.exception(f"{self.name} batch of {len(inputs)} failed")
+            for _, future, _ in requests:
+                future.set_exception(e)
+            return
+        finished = time.perf_counter()
+
+        offset = 0
+        for request_inputs, future, queued_at in requests:
+            future.set_result(outputs[offset:offset + len(request_inputs)])
+            offset += len(request_inputs)
+            self._wait_ms.append((started - queued_at) * 1000)
+
+        self.batches += 1
+        self.items += len(inputs)
+        self._batch_sizes.append(len(inputs))
+        self._run_ms.append((finished - started) * 1000)
+
+    def stats(self) -> Dict[str, Any]:
+        sizes = np.array(self._batch_sizes or [0])
+        run_ms = np.array(self._run_ms or [0.0])
+        wait_ms = np.array(self._wait_ms or [0.0])
+        return {
+            'batches': self.batches,
+            'items': self.items,
+            'queued': self._queue.qsize(),
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000,
+            'batch_size_mean': float(sizes.mean()),
+            'batch_size_p95': float(np.percentile(sizes, 95)),
+            'batch_ms_p50': float(np.percentile(run_ms, 50)),
+            'batch_ms_p95': float(np.percentile(run_ms, 95)),
+            'queue_wait_ms_p50': float(np.percentile(wait_ms, 50)),
+            'queue_wait_ms_p95': float(np.percentile(wait_ms, 95)),
+        }
+
+
+def stats() -> Dict[str, Dict[str, Any]]:
+    """Batch size and latency stats for every batcher in the process, over the last STATS_WINDOW batches."""
+    return {name: batcher.stats() for name, batcher in _batchers.items()}
+
+
+def encode_texts(texts: List[str]) -> np.ndarray:
+    """float32 embeddings from the job search bi-encoder, batched with concurrent searches.
+
+    job_search is imported here rather than at the top so resume and quiz code
+    don't load the job index at import time.
+    """
+    from job_search import query_encoder
+    return np.asarray(query_encoder(texts), dtype='float32')
@@ -0,0 +1,177 @@
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterator, Dict, Any
+
+import numpy as np
+import pandas as pd
+
+from job_index import create_index, effective_kind, index_kind
+from job_search import (
+    JOB_COLUMNS, JOBS_FILE, JOBS_INDEX_FILE, append_jobs_csv, build_job_index, encode_job_texts,
+    get_engine, index_config, index_lock, job_text, job_vector_id, load_jobs, read_job_index,
+    vector_store, write_index_atomic,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 5000
+DEFAULT_BATCH_SIZE = 256
+
+def iter_feed(path: Path, chunk_size: int = DEFAULT_CHUNK_SIZE, feed_format: str = None) -> Iterator[pd.DataFrame]:
+    """Yield a CSV or JSONL job feed as DataFrames of at most chunk_size rows."""
+    path = Path(path)
+    feed_format = feed_format or ('csv' if path.suffix.lower() == '.csv' else 'jsonl')
+
+    if feed_format == 'csv':
+        for chunk in pd.read_csv(path, chunksize=chunk_size, dtype=str, keep_default_na=False):
+            yield chunk
+        return
+
+    rows = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            rows.append(json.loads(line))
+            if len(rows) >= chunk_size:
+                yield pd.DataFrame(rows)
+                rows = []
+    if rows:
+        yield pd.DataFrame(rows)
+
+def _init_worker(threads: int):
+    import torch
+    torch.set_num_threads(threads)
+
+def _encode_batch(texts):
+    return encode_job_texts(texts)
+
+def ingest_feed(
+    path: Path,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    workers: int = None,
+    feed_format: str = None,
+) -> Dict[str, Any]:
+    """Stream a job feed into jobs.csv and the job index.
+
+    Chunks are encoded in batch_size slices across a process pool, and at most
+    two chunks are in flight at once, so memory stays bounded by the chunk size
+    rather than the feed size. Jobs whose job_id is already known are skipped;
+    rows without a job_id get a fresh one.
+
+    The index lock is held throughout: searches keep serving the current index,
+    and API writes wait for the ingested index instead of overwriting it.
+    """
+    with index_lock:
+        stats = _ingest_feed(path, chunk_size, batch_size, workers, feed_format)
+    get_engine().refresh(force=True)
+    return stats
+
+def _ingest_feed(path: Path, chunk_size: int, batch_size: int, workers: int, feed_format: str) -> Dict[str, Any]:
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    index = read_job_index(JOBS_INDEX_FILE, mmap=False)
+    # Read under the lock, so jobs another writer added first are skipped
+    jobs_df = load_jobs()
+    columns = list(jobs_df.columns) or JOB_COLUMNS
+    seen_ids = {job_vector_id(job_id) for job_id in jobs_df['job_id']}
+    del jobs_df
+
+    if workers > 0:
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(threads,),
+        )
+    else:
+        executor = ThreadPoolExecutor(max_workers=1)
+
+    stats = {'ingested': 0, 'skipped': 0, 'seconds': 0.0, 'jobs_per_sec': 0.0}
+    pending = deque()
+    start = time.perf_counter()
+
+    def drain_one():
+        nonlocal index
+        chunk, futures = pending.popleft()
+        embeddings = np.vstack([future.result() for future in futures])
+        vector_ids = np.array([job_vector_id(job_id) for job_id in chunk['job_id']], dtype='int64')
+        vector_store.append(vector_ids, embeddings)
+        append_jobs_csv(chunk, JOBS_FILE)
+        if index is None:
+            # Trained on the first chunk; `vector_store.py rebuild` retrains on the full corpus
+            index = create_index(embeddings, vector_ids, index_config)
+        else:
+            index.add_with_ids(embeddings, vector_ids)
+
+        stats['ingested'] += len(chunk)
+        elapsed = time.perf_counter() - start
+        logger.info(f"Ingested {stats['ingested']} jobs ({stats['ingested'] / elapsed:.1f} jobs/sec)")
+
+    try:
+        for chunk in iter_feed(path, chunk_size, feed_format):
+            chunk = chunk.reindex(columns=columns).fillna('')
+            missing = chunk['job_id'].astype(str).str.strip() == ''
+            chunk.loc[missing, 'job_id'] = [str(uuid.uuid4()) for _ in range(missing.sum())]
+
+            keep = []
+            for job_id in chunk['job_id']:
+                vector_id = job_vector_id(job_id)
+                keep.append(vector_id not in seen_ids)
+                seen_ids.add(vector_id)
+            stats['skipped'] += len(keep) - sum(keep)
+            chunk = chunk[keep].reset_index(drop=True)
+            if chunk.empty:
+                continue
+
+            texts = [job_text(job) for job in chunk.to_dict('records')]
+            futures = [executor.submit(_encode_batch, texts[i:i + batch_size]) for i in range(0, len(texts), batch_size)]
+            pending.append((chunk, futures))
+            if len(pending) > 1:
+                drain_one()
+
+        while pending:
+            drain_one()
+    finally:
+        executor.shutdown(wait=True)
+
+    if index is not None and stats['ingested']:
+        if index_kind(index) != effective_kind(index_config, index.ntotal):
+            # The corpus outgrew the index it started with (e.g. too small to train IVF
+            # on), so retrain the configured type from the stored vectors
+            build_job_index()
+        else:
+            write_index_atomic(index, JOBS_INDEX_FILE)
+
+    stats['seconds'] = time.perf_counter() - start
+    stats['jobs_per_sec'] = stats['ingested'] / stats['seconds'] if stats['seconds'] else 0.0
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream a CSV/JSONL job feed into the job index.")
+    parser.add_argument("feed", type=Path, help="Path to a .csv or .jsonl job feed")
+    parser.add_argument("--format", choices=['csv', 'jsonl'], help="Feed format (defaults to the file extension)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Rows read from the feed at a time")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Texts per encoder call")
+    parser.add_argument("--workers", type=int, default=None, help="Encoder processes (0 encodes in this process)")
+    args = parser.parse_args()
+
+    stats = ingest_feed(args.feed, args.chunk_size, args.batch_size, args.workers, args.format)
+    print(f"Ingested {stats['ingested']} jobs, skipped {stats['skipped']} duplicates "
+          f"in {stats['seconds']:.1f}s ({stats['jobs_per_sec']:.1f} jobs/sec)")
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
@@ -0,0 +1,261 @@
+import logging
+import os
+import re
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# off: every turn asks the model which tool to call
+# keywords: clear-cut requests matched by the rules below go straight to their tool
+# embeddings: keywords, then a nearest-example classifier on the bi-encoder for the rest
+# Off by default: tests/test_intent_router.py holds the labelled messages the
+# rules are checked against; extend it with real traffic before turning them on
+ROUTER_MODES = ("off", "keywords", "embeddings")
+ROUTER_MODE = os.getenv("ROUTER_MODE", "off")
+EMBEDDING_THRESHOLD = float(os.getenv("ROUTER_EMBEDDING_THRESHOLD", 0.75))
+EMBEDDING_MARGIN = float(os.getenv("ROUTER_EMBEDDING_MARGIN", 0.1))
+STATS_WINDOW = 1000
+
+if ROUTER_MODE not in ROUTER_MODES:
+    raise ValueError(f"ROUTER_MODE must be one of {ROUTER_MODES}, got {ROUTER_MODE!r}")
+
+
+@dataclass
+class Intent:
+    tool: str
+    args: Dict[str, Any] = field(default_factory=dict)
+    method: str = "keywords"
+
+
+# Words that point back into the conversation; a request built on them needs the model
+_REFERENCES = {"it", "that", "this", "them", "these", "those", "the same", "the above", "the last one"}
+
+_REFERS_BACK = re.compile(r"\b(?:like (?:that|this|those|these|them|the \w+)|similar|same as|above|previous|earlier|again)\b", re.I)
+
+# Negations ("jobs not in California", "that don't require a degree") can't be
+# expressed as tool arguments, so the model handles them
+_NEGATION = re.compile(r"\b(?:not|no|never|without|except|excluding|other than|don'?t|doesn'?t|do not|does not|isn'?t|aren'?t)\b", re.I)
+# Several requests in one message ("find me jobs and quiz me on SQL") need more than one tool
+_JOINED = re.compile(
+    r"\b(?:then|also|as well as|plus)\b"
+    r"|\band\s+(?:(?:can|could|would|will) you\s+)?(?:please\s+)?"
+    r"(?:find|show|search|look|list|recommend|quiz|test|drill|challenge|prep|prepare|tell|give|get|ask|what'?s|news)\b",
+    re.I,
+)
+_STOPWORDS = {"a", "an", "the", "some", "any", "more", "new", "few", "all", "other", "good", "best", "great", "top",
+              "me", "my", "your", "of", "for", "in", "on", "to", "and", "or", "with", "at", "about", "please"}
+
+# Requests are only taken when they are imperatives ("find me remote data jobs",
+# "quiz me on SQL"): the verb has to open the message or a sentence, optionally
+# after "please" or "can you". Questions like "how do I get a job in data
+# science?" or "should I look for jobs abroad?", and remarks that merely mention
+# news or quizzes, are left to the model.
+_CLAUSE_START = r"(?:^|(?<=[.;!?])\s+)\s*"
+_POLITE = r"(?:(?:hey|hi|ok(?:ay)?|please|pls)[,!]?\s+)*(?:(?:can|could|would|will) you\s+(?:please\s+)?)?"
+_QUIZ_PATTERNS = [
+    re.compile(_CLAUSE_START + _POLITE + r"(?:quiz|test|drill|challenge) me (?:on|about|for|in) (?P<role>.+)", re.I),
+    re.compile(_CLAUSE_START + _POLITE + r"(?:(?:give|ask|send) me |generate |show me )?(?:some |a few )?"
+               r"(?:interview |practice |mock )+questions? (?:on|about|for) (?P<role>.+)", re.I),
+    re.compile(_CLAUSE_START + _POLITE + r"prep(?:are)? me for (?:an? |my )?(?P<role>.+?) interview", re.I),
+]
+_NEWS_PATTERNS = [
+    re.compile(_CLAUSE_START + _POLITE + r"(?:(?:tell|give|show|get) me |find |search for )?(?:the |some )?(?:latest |recent )?"
+               r"(?:news|updates|trends) (?:on|about|for|in|around) (?:the )?(?P<topic>.+)", re.I),
+    re.compile(_CLAUSE_START + r"what'?s (?:happening|new|going on) in (?:the )?(?P<topic>.+)", re.I),
+]
+# For jobs, the words between the verb and the job noun have to describe the
+# job, so "recommend courses for PM roles" doesn't match
+_JOB_WORD = r"(?!(?:for|to|in|at|about|on|with|of|or|and|how|courses?|advice|tips|skills?|help)\b)[\w+#./&-]+"
+_JOBS_PATTERNS = [
+    re.compile(_CLAUSE_START + _POLITE + r"(?:find|show|search(?: for)?|look for|list|recommend)(?: me)?(?: some| any| more| new)?\s+"
+               r"(?P<query>(?:" + _JOB_WORD + r"\s+){0,5}?)(?:jobs?|roles?|positions?|openings?|opportunities)\b(?P<rest>.*)", re.I),
+]
+_SALARY = re.compile(r"\b(?:over|above|at least|more than|min(?:imum)?)\s*\$?(?P<amount>\d+(?:\.\d+)?)\s*(?P<k>k)?\b", re.I)
+_LOCATION = re.compile(r"\bin (?P<location>[A-Z][\w .'-]+?)(?:$|[,.?!]| (?:that|with|paying|over|above|posted|from|or|and)\b)")
+_POSTED = {"today": 1, "this week": 7, "past week": 7, "last week": 7, "this month": 30, "past month": 30, "last month": 30}
+
+
+def _clean_phrase(text: str) -> str:
+    text = re.sub(r"[?.!]+$", "", text.strip())
+    text = re.sub(r"^(?:a|an|the|some)\s+", "", text, flags=re.I)
+    return " ".join(text.split())
+
+
+def _usable(phrase: str) -> bool:
+    """A phrase that can stand on its own as a tool argument: not a reference back, a number or only filler words."""
+    if not phrase or phrase.lower() in _REFERENCES or len(phrase) > 100:
+        return False
+    if re.match(r"(?:my|your|our)\b", phrase, re.I):
+        # "what's new in my resume" is about the user, not the news
+        return False
+    return any(word not in _STOPWORDS and not re.fullmatch(r"[\d.,$k+-]+", word)
+               for word in re.findall(r"[\w+#.$-]+", phrase.lower()))
+
+
+def needs_model(text: str) -> bool:
+    """True for messages no rule should route: references back, negations or several requests."""
+    return bool(_REFERS_BACK.search(text) or _NEGATION.search(text) or _JOINED.search(text))
+
+
+def _job_filters(text: str) -> Dict[str, Any]:
+    filters = {}
+    lowered = text.lower()
+    if "remote" in lowered:
+        filters["remote_only"] = True
+    salary = _SALARY.search(text)
+    if salary:
+        amount = float(salary.group("amount"))
+        filters["min_salary"] = amount * 1000 if salary.group("k") or amount < 1000 else amount
+    location = _LOCATION.search(text)
+    if location:
+        filters["location"] = location.group("location").strip()
+    for phrase, days in _POSTED.items():
+        if phrase in lowered:
+            filters["posted_within_days"] = days
+            break
+    return filters
+
+
+def _match_patterns(text: str) -> List[Optional[Intent]]:
+    """What each tool's rules make of the message: an intent, None for a match
+    whose argument isn't usable, and nothing for a tool whose rules don't match."""
+    matches = []
+    for pattern in _QUIZ_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            role = _clean_phrase(match.group("role"))
+            matches.append(Intent("fetch_quiz_questions", {"role": role}) if _usable(role) else None)
+            break
+
+    for pattern in _NEWS_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            topic = _clean_phrase(match.group("topic"))
+            matches.append(Intent("search_job_news", {"topic": topic}) if _usable(topic) else None)
+            break
+
+    for pattern in _JOBS_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            query = _clean_phrase(re.sub(r"\bremote\b", "", match.group("query"), flags=re.I))
+            # Alternatives ("in Berlin or Munich") need the model to pick the arguments
+            if re.search(r"\bor\b", match.group("rest"), re.I) or (query and not _usable(query)):
+                matches.append(None)
+            else:
+                args = {"query": query} if query else {}
+                args.update(_job_filters(text))
+                matches.append(Intent("find_jobs", args))
+            break
+    return matches
+
+
+def match_keywords(text: str) -> Optional[Intent]:
+    """An intent for a single request that names its tool and its argument outright, else None."""
+    if needs_model(text):
+        return None
+    matches = _match_patterns(text)
+    return matches[0] if len(matches) == 1 else None
+
+
+# A few phrasings per tool; tools whose argument can't be taken from the whole
+# message (the quiz role) are left to the keyword rules and the model
+_EXAMPLES = {
+    "find_jobs": [
+        "find me jobs", "any openings for a data engineer", "I'm looking for a new position in marketing",
+        "are there backend engineering roles hiring", "job opportunities for product managers",
+    ],
+    "search_job_news": [
+        "what's the latest in the tech job market", "any news on AI hiring", "how is the job market for designers",
+        "recent layoffs and hiring trends", "updates on remote work trends",
+    ],
+}
+
+
+class EmbeddingClassifier:
+    """Nearest-example intent classifier on the bi-encoder that job search already loads."""
+
+    def __init__(self, encode):
+        self.encode = encode
+        self._examples = None
+        self._labels: List[str] = []
+        self._lock = threading.Lock()
+
+    def _ensure_examples(self):
+        if self._examples is None:
+            with self._lock:
+                if self._examples is None:
+                    labels = [tool for tool, examples in _EXAMPLES.items() for _ in examples]
+                    texts = [text for examples in _EXAMPLES.values() for text in examples]
+                    self._labels = labels
+                    self._examples = np.asarray(self.encode(texts), dtype='float32')
+
+    def classify(self, text: str) -> Optional[Intent]:
+        self._ensure_examples()
+        similarities = self._examples @ np.asarray(self.encode([text]), dtype='float32')[0]
+        best_by_tool: Dict[str, float] = {}
+        for label, similarity in zip(self._labels, similarities):
+            best_by_tool[label] = max(best_by_tool.get(label, -1.0), float(similarity))
+        ranked = sorted(best_by_tool.items(), key=lambda item: item[1], reverse=True)
+        tool, best = ranked[0]
+        runner_up = ranked[1][1] if len(ranked) > 1 else -1.0
+        if best < EMBEDDING_THRESHOLD or best - runner_up < EMBEDDING_MARGIN:
+            return None
+        args = {"query": text} if tool == "find_jobs" else {"topic": text}
+        if tool == "find_jobs":
+            args.update(_job_filters(text))
+        return Intent(tool, args, method="embeddings")
+
+
+class IntentRouter:
+    """Decides, without a model call, which tool a clear-cut message needs.
+
+    Returns None whenever the message is ambiguous, refers back to the
+    conversation, or matches nothing, so the model still handles everything the
+    rules aren't sure of. Counts and turn latencies are kept per path.
+    """
+
+    def __init__(self, mode: str = ROUTER_MODE, encode=None):
+        self.mode = mode
+        self.classifier = EmbeddingClassifier(encode) if mode == "embeddings" and encode else None
+        self._lock = threading.Lock()
+        self._counts: Dict[str, int] = {}
+        self._seconds: Dict[str, deque] = {}
+
+    def route(self, text: str) -> Optional[Intent]:
+        if self.mode == "off" or needs_model(text):
+            return None
+        intent = match_keywords(text)
+        if intent is None and self.classifier is not None:
+            try:
+                intent = self.classifier.classify(text)
+            except Exception:
+                logger.exception("Embedding intent classifier failed")
+        return intent
+
+    def record(self, path: str, seconds: float):
+        with self._lock:
+            self._counts[path] = self._counts.get(path, 0) + 1
+            self._seconds.setdefault(path, deque(maxlen=STATS_WINDOW)).append(seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = sum(self._counts.values())
+            fast = total - self._counts.get("llm", 0)
+            return {
+                'mode': self.mode,
+                'turns': total,
+                'fast_path_ratio': fast / total if total else 0.0,
+                'paths': {
+                    path: {
+                        'turns': count,
+                        'turn_seconds_p50': float(np.percentile(self._seconds[path], 50)),
+                        'turn_seconds_p95': float(np.percentile(self._seconds[path], 95)),
+                    }
+                    for path, count in self._counts.items()
+                },
+            }
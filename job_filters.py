@@ -0,0 +1,92 @@
+import re
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+_SALARY_NUMBER = re.compile(r'(\d+(?:\.\d+)?)\s*([kK])?')
+
+
+def parse_salary_range(value) -> Tuple[float, float]:
+    """Parse '120000-150000', '$120k-150k' or '$130k' into (low, high); NaN when unknown."""
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return np.nan, np.nan
+    amounts = []
+    for number, thousands in _SALARY_NUMBER.findall(str(value).replace(',', '')):
+        amount = float(number)
+        if thousands:
+            amount *= 1000
+        amounts.append(amount)
+    if not amounts:
+        return np.nan, np.nan
+    # "$120k-150k": the k on the upper bound applies to the lower bound too
+    if len(amounts) > 1 and amounts[0] < 1000 <= amounts[-1]:
+        amounts[0] *= 1000
+    return min(amounts), max(amounts)
+
+
+def normalize_location(value) -> str:
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return ""
+    return " ".join(str(value).lower().split())
+
+
+class JobAttributes:
+    """Typed columns and a location index over the jobs table, parsed once per load.
+
+    Salary and posting date become float / datetime64 arrays, and each distinct
+    location maps to the rows that have it, so structured filters are evaluated
+    with array operations instead of re-parsing strings on every search.
+    """
+
+    def __init__(self, jobs_df: pd.DataFrame):
+        count = len(jobs_df)
+        salaries = [parse_salary_range(value) for value in jobs_df.get('salary', pd.Series([None] * count))]
+        self.salary_min = np.array([low for low, _ in salaries], dtype='float64').reshape(count)
+        self.salary_max = np.array([high for _, high in salaries], dtype='float64').reshape(count)
+
+        posted = pd.to_datetime(jobs_df.get('posting_date', pd.Series([None] * count)), errors='coerce')
+        self.posted_on = posted.to_numpy(dtype='datetime64[D]')
+
+        rows_by_location = defaultdict(list)
+        for row, value in enumerate(jobs_df.get('location', pd.Series([None] * count))):
+            rows_by_location[normalize_location(value)].append(row)
+        self.rows_by_location = {location: np.array(rows, dtype='int64') for location, rows in rows_by_location.items()}
+        self.remote = np.zeros(count, dtype=bool)
+        for location, rows in self.rows_by_location.items():
+            if 'remote' in location:
+                self.remote[rows] = True
+        self.count = count
+
+    def mask(self, filters: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """Boolean row mask for the given filters, or None when no filter is set."""
+        filters = {key: value for key, value in (filters or {}).items()
+                   if value is not None and value is not False and value != ""}
+        if not filters:
+            return None
+        mask = np.ones(self.count, dtype=bool)
+
+        location = normalize_location(filters.get('location'))
+        if location:
+            location_mask = np.zeros(self.count, dtype=bool)
+            for name, rows in self.rows_by_location.items():
+                if location in name:
+                    location_mask[rows] = True
+            if location == 'remote':
+                location_mask |= self.remote
+            mask &= location_mask
+        if filters.get('remote_only'):
+            mask &= self.remote
+
+        # A job matches a salary bound if its advertised range overlaps it; unknown salaries don't match
+        if filters.get('min_salary') is not None:
+            mask &= self.salary_max >= float(filters['min_salary'])
+        if filters.get('max_salary') is not None:
+            mask &= self.salary_min <= float(filters['max_salary'])
+
+        if filters.get('posted_within_days') is not None:
+            cutoff = np.datetime64(date.today() - timedelta(days=int(filters['posted_within_days'])), 'D')
+            mask &= self.posted_on >= cutoff
+        return mask
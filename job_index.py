@@ -0,0 +1,203 @@
+import hashlib
+import logging
+import math
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+import faiss
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+
+# IVF and PQ training wants a few dozen points per centroid; below that we
+# fall back to a simpler index instead of training on too little data.
+MIN_POINTS_PER_CENTROID = 39
+PQ_CENTROIDS = 256
+
+
+def job_vector_id(job_id: str) -> int:
+    """Stable int64 FAISS id for a job_id, so the index doesn't depend on CSV row order."""
+    digest = hashlib.blake2b(str(job_id).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little') & 0x7FFFFFFFFFFFFFFF
+
+
+@dataclass
+class IndexConfig:
+    """Which FAISS index to build for the job vectors and how to search it."""
+    kind: str = "flat"
+    nlist: int = 0          # IVF lists; 0 picks 4 * sqrt(n)
+    pq_m: int = 48          # PQ sub-quantizers; must divide the embedding dimension
+    nprobe: int = 16        # IVF lists visited per query
+    hnsw_m: int = 32        # HNSW graph degree
+    ef_search: int = 64     # HNSW candidate list size per query
+    train_sample: int = 50000
+
+    @classmethod
+    def from_env(cls) -> "IndexConfig":
+        config = cls(
+            kind=os.getenv("JOB_INDEX_TYPE", cls.kind),
+            nlist=int(os.getenv("JOB_INDEX_NLIST", cls.nlist)),
+            pq_m=int(os.getenv("JOB_INDEX_PQ_M", cls.pq_m)),
+            nprobe=int(os.getenv("JOB_INDEX_NPROBE", cls.nprobe)),
+            hnsw_m=int(os.getenv("JOB_INDEX_HNSW_M", cls.hnsw_m)),
+            ef_search=int(os.getenv("JOB_INDEX_EF_SEARCH", cls.ef_search)),
+            train_sample=int(os.getenv("JOB_INDEX_TRAIN_SAMPLE", cls.train_sample)),
+        )
+        if config.kind not in INDEX_TYPES:
+            raise ValueError(f"JOB_INDEX_TYPE must be one of {INDEX_TYPES}, got {config.kind!r}")
+        return config
+
+
+def _training_sample(vectors: np.ndarray, sample_size: int) -> np.ndarray:
+    if len(vectors) <= sample_size:
+        return np.ascontiguousarray(vectors, dtype='float32')
+    rows = np.sort(np.random.default_rng(0).choice(len(vectors), sample_size, replace=False))
+    return np.ascontiguousarray(vectors[rows], dtype='float32')
+
+
+def effective_kind(config: IndexConfig, count: int) -> str:
+    """The index type actually built for count vectors, stepping down when there is too little to train on."""
+    kind = config.kind
+    if kind == "ivf_pq" and count < PQ_CENTROIDS * MIN_POINTS_PER_CENTROID // 4:
+        kind = "ivf_flat"
+    if kind == "ivf_flat" and count < 4 * MIN_POINTS_PER_CENTROID:
+        kind = "flat"
+    if kind != config.kind:
+        logger.info(f"Using a {kind} index instead of {config.kind} for {count} vectors")
+    return kind
+
+
+def create_index(vectors: np.ndarray, vector_ids: np.ndarray, config: IndexConfig):
+    """Build (and train, if needed) an id-keyed inner-product index over normalized vectors."""
+    dimension = vectors.shape[1]
+    kind = effective_kind(config, len(vectors))
+    if kind == "ivf_pq" and dimension % config.pq_m:
+        raise ValueError(f"JOB_INDEX_PQ_M={config.pq_m} does not divide the embedding dimension {dimension}")
+
+    if kind == "flat":
+        index = faiss.IndexIDMap2(faiss.IndexFlatIP(dimension))
+    elif kind == "hnsw":
+        hnsw = faiss.IndexHNSWFlat(dimension, config.hnsw_m, faiss.METRIC_INNER_PRODUCT)
+        index = faiss.IndexIDMap2(hnsw)
+    else:
+        # IVF indexes store ids in their inverted lists, so they need no id map
+        nlist = config.nlist or int(4 * math.sqrt(len(vectors)))
+        nlist = max(1, min(nlist, len(vectors) // MIN_POINTS_PER_CENTROID))
+        quantizer = faiss.IndexFlatIP(dimension)
+        if kind == "ivf_pq":
+            index = faiss.IndexIVFPQ(quantizer, dimension, nlist, config.pq_m, 8, faiss.METRIC_INNER_PRODUCT)
+        else:
+            index = faiss.IndexIVFFlat(quantizer, dimension, nlist, faiss.METRIC_INNER_PRODUCT)
+        index.train(_training_sample(vectors, config.train_sample))
+
+    if len(vectors):
+        index.add_with_ids(np.ascontiguousarray(vectors, dtype='float32'), np.asarray(vector_ids, dtype='int64'))
+    configure_search(index, config)
+    return index
+
+
+def configure_search(index, config: IndexConfig):
+    """Apply the query-time knobs (nprobe / efSearch) to a loaded index."""
+    inner = faiss.downcast_index(index.index) if hasattr(index, 'id_map') else index
+    if isinstance(inner, faiss.IndexIVF):
+        inner.nprobe = min(config.nprobe, inner.nlist)
+    elif isinstance(inner, faiss.IndexHNSW):
+        inner.hnsw.efSearch = config.ef_search
+    return index
+
+
+def search_parameters(index, config: IndexConfig, exclude_ids: np.ndarray = None, include_ids: np.ndarray = None):
+    """Per-query search parameters for this index type, optionally restricted to or excluding vector ids.
+
+    The restriction is applied inside the FAISS scan, so the number of results
+    doesn't shrink when a user has already seen most of the top matches or a
+    filter rules out most of the corpus. An IVF index only scans `nprobe`
+    lists, so with include_ids it visits proportionally more of them, aiming
+    to see as many allowed vectors as an unrestricted search would.
+    """
+    inner = faiss.downcast_index(index.index) if hasattr(index, 'id_map') else index
+    if isinstance(inner, faiss.IndexIVF):
+        nprobe = config.nprobe
+        if include_ids is not None and len(include_ids):
+            nprobe = math.ceil(nprobe * max(1.0, index.ntotal / len(include_ids)))
+        params = faiss.SearchParametersIVF(nprobe=min(nprobe, inner.nlist))
+    elif isinstance(inner, faiss.IndexHNSW):
+        params = faiss.SearchParametersHNSW(efSearch=config.ef_search)
+    else:
+        params = faiss.SearchParameters()
+
+    if include_ids is not None:
+        selector = faiss.IDSelectorBatch(np.ascontiguousarray(include_ids, dtype='int64'))
+        params.sel = selector
+        params.referenced_objects = [selector]
+    elif exclude_ids is not None and len(exclude_ids):
+        excluded = faiss.IDSelectorBatch(np.ascontiguousarray(exclude_ids, dtype='int64'))
+        selector = faiss.IDSelectorNot(excluded)
+        params.sel = selector
+        # SWIG doesn't keep the selectors alive on its own
+        params.referenced_objects = [excluded, selector]
+    return params
+
+
+def index_kind(index) -> str:
+    inner = faiss.downcast_index(index.index) if hasattr(index, 'id_map') else index
+    if isinstance(inner, faiss.IndexIVFPQ):
+        return "ivf_pq"
+    if isinstance(inner, faiss.IndexIVF):
+        return "ivf_flat"
+    if isinstance(inner, faiss.IndexHNSW):
+        return "hnsw"
+    return "flat"
+
+
+def is_id_keyed(index) -> bool:
+    """False for the old positional IndexFlatIP, whose labels are CSV row numbers."""
+    return hasattr(index, 'id_map') or isinstance(index, faiss.IndexIVF)
+
+
+def index_ids(index) -> np.ndarray:
+    """All vector ids currently stored in the index."""
+    if hasattr(index, 'id_map'):
+        return faiss.vector_to_array(index.id_map)
+    invlists = index.invlists
+    parts = [
+        faiss.rev_swig_ptr(invlists.get_ids(list_no), invlists.list_size(list_no)).copy()
+        for list_no in range(index.nlist) if invlists.list_size(list_no)
+    ]
+    return np.concatenate(parts) if parts else np.empty(0, dtype='int64')
+
+
+def remove_ids(index, vector_ids: np.ndarray) -> bool:
+    """Remove ids in place. Returns False for index types that can't (HNSW), which need a rebuild."""
+    try:
+        index.remove_ids(np.asarray(vector_ids, dtype='int64'))
+    except RuntimeError:
+        return False
+    return True
+
+
+def stored_is_ivf(path: Path) -> bool:
+    """Whether the index file holds an IVF index, read from its leading fourcc.
+
+    IVF indexes are written bare ("IwFl", "IwPQ", older "IvFl"...), flat and HNSW
+    inside an IndexIDMap2 ("IxM2"). The file may not match the configured type,
+    e.g. a small corpus fell back to flat, or JOB_INDEX_TYPE changed before a rebuild.
+    """
+    with open(path, 'rb') as f:
+        return f.read(2) in (b'Iv', b'Iw')
+
+
+def read_index(path: Path, config: IndexConfig, mmap: bool = True):
+    if not path.exists():
+        return None
+    if mmap:
+        # Flat and HNSW vectors are mapped through IO_FLAG_MMAP_IFC, IVF lists through IO_FLAG_MMAP
+        flags = faiss.IO_FLAG_MMAP if stored_is_ivf(path) else faiss.IO_FLAG_MMAP_IFC
+        try:
+            return configure_search(faiss.read_index(str(path), flags), config)
+        except RuntimeError:
+            logger.warning(f"Could not memory-map {path}, reading it into memory")
+    return configure_search(faiss.read_index(str(path)), config)
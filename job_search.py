@@ -1,157 +1,503 @@
-import csv
+import logging
+import os
+import threading
+import time
+import uuid
 import faiss
 import numpy as np
 import pandas as pd
-from sentence_transformers import SentenceTransformer, CrossEncoder
 from pathlib import Path
-from datetime import datetime
 from typing import List, Dict, Any
-
-bi_encoder = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2')
-cross_encoder = CrossEncoder('cross-encoder/ms-marco-MiniLM-L-6-v2')
+import models
+from vector_store import FileLock, JobVectorStore
+import job_index
+from job_index import IndexConfig, job_vector_id
+from impressions import ImpressionStore
+from job_filters import JobAttributes
+from rerank import CascadeReranker, RerankConfig
+from inference import MicroBatcher
+from resume_profile import user_resume_profile
+from resume_vectors import resume_vectors
 
 JOBS_FILE = Path("data/jobs.csv")
-JOBS_SHOWN_FILE = Path("data/jobs_shown.csv")
 JOBS_INDEX_FILE = Path("data/jobs.index")
-RESUMES_DIR = Path("data/resumes")
+# Held by every process that writes jobs.index, from reading the index it starts
+# from until the new one is renamed into place, so no writer's changes are lost
+index_lock = FileLock(JOBS_INDEX_FILE.with_name(JOBS_INDEX_FILE.name + ".lock"))
+
+JOB_COLUMNS = ['job_id', 'job_title', 'company', 'job_link', 'description', 'requirements', 'location', 'salary', 'posting_date']
+
+logger = logging.getLogger(__name__)
+
+vector_store = JobVectorStore()
+index_config = IndexConfig.from_env()
+impression_store = ImpressionStore()
+# Queries and rerank pairs from concurrent searches share encoder calls
+query_encoder = MicroBatcher("bi_encoder", lambda texts: encode_job_texts(texts))
+pair_scorer = MicroBatcher("cross_encoder", lambda pairs: models.get_cross_encoder().predict(pairs))
+reranker = CascadeReranker(pair_scorer, RerankConfig.from_env())
 
 def load_jobs() -> pd.DataFrame:
     if not JOBS_FILE.exists():
-        return pd.DataFrame(columns=['job_id', 'job_title', 'company', 'job_link', 'description', 'requirements', 'location', 'salary', 'posting_date'])
-    return pd.read_csv(JOBS_FILE)
+        return pd.DataFrame(columns=JOB_COLUMNS)
+    # job_ids are strings even when they look numeric, so lookups by id match
+    return pd.read_csv(JOBS_FILE, dtype={'job_id': str})
 
 def load_jobs_shown(user_id: str) -> set:
-    if not JOBS_SHOWN_FILE.exists():
-        return set()
-    
-    df = pd.read_csv(JOBS_SHOWN_FILE)
-    user_jobs = df[df['user_id'] == user_id]['job_id'].tolist()
-    return set(user_jobs)
+    return impression_store.shown_job_ids(user_id)
 
 def save_job_shown(user_id: str, job_id: str):
-    timestamp = datetime.now().isoformat()
-    
-    # Create file with headers if it doesn't exist
-    if not JOBS_SHOWN_FILE.exists():
-        with open(JOBS_SHOWN_FILE, 'w', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow(['user_id', 'job_id', 'timestamp'])
-    
-    # Append new record
-    with open(JOBS_SHOWN_FILE, 'a', newline='') as f:
-        writer = csv.writer(f)
-        writer.writerow([user_id, job_id, timestamp])
+    impression_store.record(user_id, [job_id])
 
-def build_job_index():
-    jobs_df = load_jobs()
-    
-    if jobs_df.empty:
-        print("No jobs found to index")
-        return None
-    
-    job_texts = []
-    for _, job in jobs_df.iterrows():
-        text = f"{job['job_title']} {job['description']} {job['requirements']}"
-        job_texts.append(text)
-    
-    embeddings = bi_encoder.encode(job_texts)
-    
-    dimension = embeddings.shape[1]
-    index = faiss.IndexFlatIP(dimension)
+def save_jobs_shown(user_id: str, job_ids: List[str]):
+    impression_store.record(user_id, job_ids)
+
+JOB_TEXT_FIELDS = ('job_title', 'description', 'requirements')
+
+def job_text(job) -> str:
+    return f"{job['job_title']} {job['description']} {job['requirements']}"
 
+def encode_job_texts(job_texts: List[str]) -> np.ndarray:
+    embeddings = np.asarray(models.get_bi_encoder().encode(job_texts), dtype='float32')
     faiss.normalize_L2(embeddings)
-    index.add(embeddings.astype('float32'))
-    
-    faiss.write_index(index, str(JOBS_INDEX_FILE))
-    print(f"Built index with {len(job_texts)} jobs")
+    return embeddings
+
+def encode_jobs(job_texts: List[str], vector_ids: np.ndarray) -> np.ndarray:
+    """Encode job texts and keep the vectors in the vector store for later rebuilds."""
+    embeddings = encode_job_texts(job_texts)
+    vector_store.append(vector_ids, embeddings)
+    return embeddings
+
+def write_index_atomic(index, path: Path = JOBS_INDEX_FILE):
+    """Write the index next to its destination and rename it into place."""
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    faiss.write_index(index, str(tmp_path))
+    os.replace(tmp_path, path)
+
+def read_job_index(path: Path = JOBS_INDEX_FILE, mmap: bool = True):
+    """Open the job index; with mmap the vectors are mapped read-only and shared between processes.
+
+    A mapped index must not be modified, so writers load their own copy with mmap=False.
+    """
+    return job_index.read_index(path, index_config, mmap=mmap)
+
+def write_jobs_atomic(jobs_df: pd.DataFrame, path: Path = JOBS_FILE):
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    jobs_df.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+def append_jobs_csv(jobs_df: pd.DataFrame, path: Path = JOBS_FILE):
+    """Append rows to the jobs CSV, writing the header only if the file is new."""
+    if not path.exists() or path.stat().st_size == 0:
+        jobs_df.to_csv(path, index=False)
+        return
+    with open(path, 'rb+') as f:
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) != b'\n':
+            f.write(b'\n')
+    jobs_df.to_csv(path, mode='a', header=False, index=False)
+
+def build_job_index(jobs_df: pd.DataFrame = None):
+    with index_lock:
+        if jobs_df is None:
+            jobs_df = load_jobs()
+        
+        if jobs_df.empty:
+            print("No jobs found to index")
+            return None
+        
+        vector_ids = np.array([job_vector_id(job_id) for job_id in jobs_df['job_id']], dtype='int64')
+        
+        # Reuse stored vectors and only run the encoder for jobs the store hasn't seen
+        stored_ids, stored_vectors = vector_store.latest(vector_ids)
+        missing = ~np.isin(vector_ids, stored_ids)
+        if missing.any():
+            records = jobs_df[missing].to_dict('records')
+            encode_jobs([job_text(job) for job in records], vector_ids[missing])
+            stored_ids, stored_vectors = vector_store.latest(vector_ids)
+        
+        index = job_index.create_index(stored_vectors, stored_ids, index_config)
+        
+        write_index_atomic(index)
+    print(f"Built index with {len(stored_ids)} jobs ({int(missing.sum())} encoded)")
     return index
 
 def load_job_index():
     if JOBS_INDEX_FILE.exists():
-        return faiss.read_index(str(JOBS_INDEX_FILE))
+        return read_job_index()
     else:
         return build_job_index()
 
-def get_user_resume_text(user_id: str) -> str:
-    resume_file = RESUMES_DIR / f"{user_id}.txt"
-    
-    if not resume_file.exists():
-        return ""
-    
+# A filter leaving at most this many jobs is scored exactly against their stored
+# vectors instead of through the index
+FILTER_EXACT_MAX = int(os.getenv("JOB_FILTER_EXACT_MAX", 2000))
+
+def exact_search(queries: np.ndarray, allowed_ids: np.ndarray, k: int):
+    """index.search restricted to allowed_ids, by dot product with their stored vectors."""
+    ids, vectors = vector_store.latest(allowed_ids)
+    k = min(k, len(ids))
+    if not k:
+        return np.empty((len(queries), 0), dtype='float32'), np.empty((len(queries), 0), dtype='int64')
+    scores = np.asarray(queries, dtype='float32') @ np.asarray(vectors).T
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    top_scores = np.take_along_axis(scores, top, axis=1)
+    order = np.argsort(-top_scores, axis=1, kind='stable')
+    return np.take_along_axis(top_scores, order, axis=1), ids[np.take_along_axis(top, order, axis=1)]
+
+def filtered_search(index, queries: np.ndarray, k: int, allowed_ids: np.ndarray):
+    """Top k of allowed_ids for each query, never fewer than the allowed set holds.
+
+    Small allowed sets are scored exactly. Larger ones go through the index;
+    if an IVF index's probed lists held too few allowed jobs, those are scored
+    exactly too, so a selective filter never loses valid matches.
+    """
+    k = min(k, len(allowed_ids))
+    if len(allowed_ids) <= FILTER_EXACT_MAX:
+        return exact_search(queries, allowed_ids, k)
+    params = job_index.search_parameters(index, index_config, include_ids=allowed_ids)
+    scores, labels = index.search(queries, k, params=params)
+    if (labels >= 0).sum(axis=1).min() < k:
+        return exact_search(queries, allowed_ids, k)
+    return scores, labels
+
+def fuse_multi_vector(scores: np.ndarray, labels: np.ndarray, k: int):
+    """One ranked list from the results of several query vectors, each job scored by its best match."""
+    best: Dict[int, float] = {}
+    for score, label in zip(scores.ravel().tolist(), labels.ravel().tolist()):
+        if label >= 0 and score > best.get(label, -np.inf):
+            best[label] = score
+    ranked = sorted(best.items(), key=lambda item: item[1], reverse=True)[:k]
+    return [score for _, score in ranked], [label for label, _ in ranked]
+
+def _file_version(path: Path):
     try:
-        with open(resume_file, 'r', encoding='utf-8') as f:
-            return f.read().strip()
-    except Exception:
-        return ""
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
 
-def search_jobs(user_id: str, query: str = None, top_k: int = 10) -> List[Dict[str, Any]]:
+class JobSearchEngine:
+    """Keeps the jobs table, its FAISS index and the job texts resident between searches.
 
-    jobs_df = load_jobs()
-    if jobs_df.empty:
-        return []
-    
-    jobs_shown = load_jobs_shown(user_id)
-    index = load_job_index()
-    
-    if index is None:
-        return []
-    
-    if query:
-        search_text = query
-    else:
-        search_text = get_user_resume_text(user_id)
-        if not search_text:
+    The table is held as one array per column, so a search result is assembled by
+    indexing those arrays instead of going through a DataFrame row by row. The
+    files on disk are stat'ed before each search and only re-read when they change.
+
+    The index is keyed on job_vector_id(job_id) rather than row position, so jobs can
+    be added, updated and removed by encoding only the rows that changed.
+    """
+
+    def __init__(self):
+        self.jobs_file = JOBS_FILE
+        self.index_file = JOBS_INDEX_FILE
+        self.columns: Dict[str, np.ndarray] = {}
+        self.job_texts: List[str] = []
+        self.vector_ids = np.empty(0, dtype='int64')
+        self.row_by_vector_id: Dict[int, int] = {}
+        self.attributes = JobAttributes(pd.DataFrame(columns=JOB_COLUMNS))
+        self.index = None
+        self._version = None
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.job_texts)
+
+    @property
+    def loaded(self) -> bool:
+        return self._version is not None
+
+    def _disk_version(self):
+        return (_file_version(self.jobs_file), _file_version(self.index_file))
+
+    def refresh(self, force: bool = False) -> bool:
+        """Reload the jobs table and index if the files changed on disk. Returns True if reloaded."""
+        with self._lock:
+            if not force and self._version is not None and self._version == self._disk_version():
+                return False
+            self._load()
+            return True
+
+    def _load(self):
+        self._set_table(load_jobs())
+        self.index = self._sync_index(read_job_index(self.index_file))
+        self._version = self._disk_version()
+        logger.info(f"Loaded {len(self.job_texts)} jobs into the search engine")
+
+    def _set_table(self, jobs_df: pd.DataFrame):
+        self.columns = {col: jobs_df[col].to_numpy(dtype=object) for col in jobs_df.columns}
+        self.job_texts = [job_text(job) for job in jobs_df.to_dict('records')]
+        self.vector_ids = np.array([job_vector_id(job_id) for job_id in jobs_df['job_id']], dtype='int64')
+        self.row_by_vector_id = {int(vid): row for row, vid in enumerate(self.vector_ids)}
+        self.attributes = JobAttributes(jobs_df)
+
+    def _sync_index(self, index):
+        """Bring the index in line with the jobs table, encoding only rows it is missing."""
+        if not self.job_texts:
+            return index
+        if index is None or not job_index.is_id_keyed(index):
+            # No index yet, or a positional index from before jobs were keyed by id
+            logger.info("Building job index from scratch")
+            return self._rebuild_index()
+        expected_kind = job_index.effective_kind(index_config, len(self.job_texts))
+        if job_index.index_kind(index) != expected_kind:
+            logger.warning(f"Job index is {job_index.index_kind(index)} but {expected_kind} is configured; "
+                           "run `python vector_store.py rebuild` to switch")
+
+        if not self._index_differences(index):
+            return index
+        if not index_lock.acquire(blocking=False):
+            # Another process is writing the index (e.g. an ingest); serve this one
+            # and sync once its write changes the file
+            logger.info("Job index is being written elsewhere, searching the current one")
+            return index
+        try:
+            # Re-read under the lock: another process may have synced it meanwhile
+            index = read_job_index(self.index_file, mmap=False)
+            if index is None:
+                return self._rebuild_index()
+            differences = self._index_differences(index)
+            if not differences:
+                return read_job_index(self.index_file)
+            stale_ids, missing_rows = differences
+            if stale_ids and not job_index.remove_ids(index, np.array(sorted(stale_ids), dtype='int64')):
+                return self._rebuild_index()
+            if missing_rows:
+                embeddings = encode_jobs([self.job_texts[row] for row in missing_rows], self.vector_ids[missing_rows])
+                index.add_with_ids(embeddings, self.vector_ids[missing_rows])
+            logger.info(f"Synced job index: {len(missing_rows)} added, {len(stale_ids)} removed")
+            write_index_atomic(index, self.index_file)
+            return read_job_index(self.index_file)
+        finally:
+            index_lock.release()
+
+    def _index_differences(self, index):
+        """(stale ids, missing rows) between the index and the jobs table, or None if they agree."""
+        indexed_ids = set(job_index.index_ids(index).tolist())
+        stale_ids = indexed_ids - self.row_by_vector_id.keys()
+        missing_rows = [row for vid, row in self.row_by_vector_id.items() if vid not in indexed_ids]
+        if not stale_ids and not missing_rows:
+            return None
+        return stale_ids, missing_rows
+
+    def _rebuild_index(self):
+        """Rebuild the index from the vector store, encoding only jobs it has no vector for."""
+        build_job_index(load_jobs())
+        return read_job_index(self.index_file)
+
+    def _commit(self, jobs_df: pd.DataFrame, index):
+        if index is None:
+            # The index type can't remove in place, rebuild it from stored vectors
+            self._set_table(jobs_df)
+            self.index = self._rebuild_index()
+        else:
+            write_index_atomic(index, self.index_file)
+            self._set_table(jobs_df)
+            self.index = read_job_index(self.index_file)
+        self._version = self._disk_version()
+
+    def add_jobs(self, jobs: List[Dict[str, Any]]) -> List[str]:
+        """Append jobs to the CSV and index, encoding only the new rows. Returns their job_ids."""
+        if not jobs:
             return []
-    
-    query_embedding = bi_encoder.encode([search_text])
-    faiss.normalize_L2(query_embedding)
-    
-    scores, indices = index.search(query_embedding.astype('float32'), min(top_k * 3, len(jobs_df)))
-    
-    candidates = []
-    for score, idx in zip(scores[0], indices[0]):
-        if idx < len(jobs_df):
-            job = jobs_df.iloc[idx]
-            if job['job_id'] not in jobs_shown:
-                job_dict = job.to_dict()
+        with self._lock, index_lock:
+            self.refresh()
+            new_rows = []
+            batch_ids = set()
+            for job_data in jobs:
+                job = dict(job_data)
+                job.setdefault('job_id', str(uuid.uuid4()))
+                vector_id = job_vector_id(job['job_id'])
+                if vector_id in self.row_by_vector_id:
+                    raise ValueError(f"Job {job['job_id']} already exists")
+                if vector_id in batch_ids:
+                    raise ValueError(f"Job {job['job_id']} appears more than once in the batch")
+                batch_ids.add(vector_id)
+                new_rows.append(job)
+
+            new_df = pd.DataFrame(new_rows)
+            vector_ids = np.array([job_vector_id(job['job_id']) for job in new_rows], dtype='int64')
+            embeddings = encode_jobs([job_text(job) for job in new_rows], vector_ids)
+
+            columns = list(self.columns) or list(new_df.columns)
+            new_df = new_df.reindex(columns=columns)
+            append_jobs_csv(new_df, self.jobs_file)
+
+            index = read_job_index(self.index_file, mmap=False)
+            if index is None:
+                index = job_index.create_index(embeddings, vector_ids, index_config)
+            else:
+                index.add_with_ids(embeddings, vector_ids)
+            self._commit(load_jobs(), index)
+            return [job['job_id'] for job in new_rows]
+
+    def update_job(self, job_id: str, updates: Dict[str, Any]):
+        """Update fields of one job, re-encoding it only if its text changed."""
+        with self._lock, index_lock:
+            self.refresh()
+            vector_id = job_vector_id(job_id)
+            if vector_id not in self.row_by_vector_id:
+                raise KeyError(f"Unknown job_id {job_id}")
+
+            jobs_df = load_jobs()
+            row = self.row_by_vector_id[vector_id]
+            for field, value in updates.items():
+                if field != 'job_id':
+                    jobs_df.loc[row, field] = value
+            write_jobs_atomic(jobs_df, self.jobs_file)
+
+            index = read_job_index(self.index_file, mmap=False)
+            if any(field in updates for field in JOB_TEXT_FIELDS):
+                ids = np.array([vector_id], dtype='int64')
+                embedding = encode_jobs([job_text(jobs_df.loc[row])], ids)
+                if job_index.remove_ids(index, ids):
+                    index.add_with_ids(embedding, ids)
+                else:
+                    index = None
+            self._commit(jobs_df, index)
+
+    def remove_job(self, job_id: str) -> bool:
+        """Remove a job from the CSV and index. Returns False if it wasn't there."""
+        with self._lock, index_lock:
+            self.refresh()
+            vector_id = job_vector_id(job_id)
+            if vector_id not in self.row_by_vector_id:
+                return False
+
+            jobs_df = load_jobs()
+            keep = jobs_df['job_id'] != str(job_id)
+            if keep.all():
+                return False
+            jobs_df = jobs_df[keep].reset_index(drop=True)
+            write_jobs_atomic(jobs_df, self.jobs_file)
+
+            index = read_job_index(self.index_file, mmap=False)
+            if not job_index.remove_ids(index, np.array([vector_id], dtype='int64')):
+                index = None
+            self._commit(jobs_df, index)
+            return True
+
+    def search(self, user_id: str, query: str = None, top_k: int = 10,
+               filters: Dict[str, Any] = None, record_shown: bool = True) -> List[Dict[str, Any]]:
+        """Semantic job search for a user, optionally restricted by job_filters fields.
+
+        Filters and already-shown jobs are applied before scoring (see
+        filtered_search), so every candidate sent to the cross-encoder is one
+        that can be returned. With record_shown=False the results aren't
+        recorded as shown; the caller does that once the user has them.
+        """
+        self.refresh()
+        with self._lock:
+            index, columns, job_texts = self.index, self.columns, self.job_texts
+            row_by_vector_id, vector_ids, attributes = self.row_by_vector_id, self.vector_ids, self.attributes
+        if index is None or not job_texts:
+            return []
+        
+        shown_ids = impression_store.shown_vector_ids(user_id)
+        mask = attributes.mask(filters)
+        allowed_ids = None
+        if mask is None:
+            params = job_index.search_parameters(index, index_config, exclude_ids=shown_ids)
+            pool_size = len(job_texts)
+        else:
+            allowed_ids = np.setdiff1d(vector_ids[mask], shown_ids)
+            if not len(allowed_ids):
+                return []
+            pool_size = len(allowed_ids)
+        
+        def knn(queries: np.ndarray):
+            if allowed_ids is None:
+                return index.search(queries, k, params=params)
+            return filtered_search(index, queries, k, allowed_ids)
+        
+        k = min(top_k * 3, pool_size)
+        if query:
+            search_text = query
+            scores, labels = knn(query_encoder([search_text]))
+            scores, labels = scores[0], labels[0]
+        else:
+            # The resume was embedded at upload: look up its pooled and chunk
+            # vectors together and keep each job's best match
+            resume = resume_vectors.get(user_id)
+            profile = user_resume_profile(user_id)
+            if resume is None or profile is None:
+                return []
+            search_text = profile.prompt_text()
+            scores, labels = knn(resume.queries)
+            scores, labels = fuse_multi_vector(scores, labels, k)
+        
+        candidates = []
+        rows = []
+        for score, label in zip(scores, labels):
+            idx = row_by_vector_id.get(int(label))
+            if idx is not None:
+                job_dict = {col: values[idx] for col, values in columns.items()}
                 job_dict['similarity_score'] = float(score)
                 candidates.append(job_dict)
-    
-    if candidates and len(candidates) > 1:
-        job_texts = []
-        for job in candidates:
-            text = f"{job['job_title']} {job['description']} {job['requirements']}"
-            job_texts.append(text)
-        
-        pairs = [[search_text, job_text] for job_text in job_texts]
+                rows.append(idx)
         
-        cross_scores = cross_encoder.predict(pairs)
+        order, rerank_scores = reranker.rerank(
+            search_text,
+            [job['job_id'] for job in candidates],
+            [job_texts[idx] for idx in rows],
+            [job['similarity_score'] for job in candidates],
+            top_k,
+        )
+        for i, score in rerank_scores.items():
+            candidates[i]['rerank_score'] = score
         
-        for i, score in enumerate(cross_scores):
-            candidates[i]['rerank_score'] = float(score)
+        results = [candidates[i] for i in order[:top_k]]
+        if record_shown:
+            save_jobs_shown(user_id, [job['job_id'] for job in results])
         
-        candidates.sort(key=lambda x: x['rerank_score'], reverse=True)
-    
-    results = candidates[:top_k]
-    for job in results:
-        save_job_shown(user_id, job['job_id'])
-    
-    return results
+        return results
+
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_engine() -> JobSearchEngine:
+    """Return the process-wide search engine, creating it on first use."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = JobSearchEngine()
+    return _engine
+
+def warm_up():
+    """Load both models, run one inference through each and map the job index."""
+    start = time.perf_counter()
+    models.get_bi_encoder().encode(["warm up"])
+    models.get_cross_encoder().predict([["warm up", "warm up"]])
+    get_engine().refresh()
+    logger.info(f"Job search warmed up in {time.perf_counter() - start:.1f}s")
+
+def is_ready() -> bool:
+    """True once the models are loaded and the job index has been mapped."""
+    return models.models_loaded() and _engine is not None and _engine.loaded
+
+def search_jobs(user_id: str, query: str = None, top_k: int = 10, location: str = None,
+                remote_only: bool = False, min_salary: float = None, max_salary: float = None,
+                posted_within_days: int = None, record_shown: bool = True) -> List[Dict[str, Any]]:
+    filters = {
+        'location': location,
+        'remote_only': remote_only,
+        'min_salary': min_salary,
+        'max_salary': max_salary,
+        'posted_within_days': posted_within_days,
+    }
+    return get_engine().search(user_id, query=query, top_k=top_k, filters=filters, record_shown=record_shown)
 
 def add_job(job_data: Dict[str, Any]) -> str:
-    import uuid
-    
-    job_id = str(uuid.uuid4())
-    job_data['job_id'] = job_id
-    
-    df = load_jobs()
-    new_job_df = pd.DataFrame([job_data])
-    df = pd.concat([df, new_job_df], ignore_index=True)
-    df.to_csv(JOBS_FILE, index=False)
-    
-    build_job_index()
-    
-    return job_id
+    return add_jobs([job_data])[0]
+
+def add_jobs(jobs: List[Dict[str, Any]]) -> List[str]:
+    return get_engine().add_jobs(jobs)
+
+def update_job(job_id: str, updates: Dict[str, Any]):
+    get_engine().update_job(job_id, updates)
+
+def remove_job(job_id: str) -> bool:
+    return get_engine().remove_job(job_id)
 
 if __name__ == "__main__":
     sample_jobs = [
@@ -0,0 +1,94 @@
+import logging
+import os
+import threading
+import time
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    # Only for the annotations; the library itself is imported when a model is loaded
+    from sentence_transformers import CrossEncoder, SentenceTransformer
+
+logger = logging.getLogger(__name__)
+
+BI_ENCODER_MODEL = 'sentence-transformers/all-MiniLM-L6-v2'
+CROSS_ENCODER_MODEL = 'cross-encoder/ms-marco-MiniLM-L-6-v2'
+
+# torch:      stock PyTorch fp32
+# torch_int8: PyTorch with dynamic int8 quantization of the Linear layers
+# onnx:       ONNX Runtime fp32 (needs `pip install optimum[onnxruntime]`)
+# onnx_int8:  ONNX Runtime with the int8 export published alongside each model
+MODEL_BACKENDS = ("torch", "torch_int8", "onnx", "onnx_int8")
+MODEL_BACKEND = os.getenv("MODEL_BACKEND", "torch")
+ONNX_INT8_FILE = os.getenv("MODEL_ONNX_INT8_FILE", "onnx/model_quint8_avx2.onnx")
+
+
+def _check_backend(backend: str):
+    if backend not in MODEL_BACKENDS:
+        raise ValueError(f"MODEL_BACKEND must be one of {MODEL_BACKENDS}, got {backend!r}")
+
+
+def _quantize_dynamic(module):
+    import torch
+    return torch.quantization.quantize_dynamic(module, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def load_bi_encoder(backend: str = MODEL_BACKEND) -> "SentenceTransformer":
+    from sentence_transformers import SentenceTransformer
+
+    _check_backend(backend)
+    logger.info(f"Loading {BI_ENCODER_MODEL} with the {backend} backend")
+    if backend == "onnx":
+        return SentenceTransformer(BI_ENCODER_MODEL, backend="onnx")
+    if backend == "onnx_int8":
+        return SentenceTransformer(BI_ENCODER_MODEL, backend="onnx", model_kwargs={"file_name": ONNX_INT8_FILE})
+    if backend == "torch_int8":
+        return _quantize_dynamic(SentenceTransformer(BI_ENCODER_MODEL, device="cpu"))
+    return SentenceTransformer(BI_ENCODER_MODEL)
+
+
+def load_cross_encoder(backend: str = MODEL_BACKEND) -> "CrossEncoder":
+    from sentence_transformers import CrossEncoder
+
+    _check_backend(backend)
+    logger.info(f"Loading {CROSS_ENCODER_MODEL} with the {backend} backend")
+    if backend == "onnx":
+        return CrossEncoder(CROSS_ENCODER_MODEL, backend="onnx")
+    if backend == "onnx_int8":
+        return CrossEncoder(CROSS_ENCODER_MODEL, backend="onnx", model_kwargs={"file_name": ONNX_INT8_FILE})
+    if backend == "torch_int8":
+        model = CrossEncoder(CROSS_ENCODER_MODEL, device="cpu")
+        model.model = _quantize_dynamic(model.model)
+        return model
+    return CrossEncoder(CROSS_ENCODER_MODEL)
+
+
+# Models are loaded on first use (or by a warm-up thread), not at import time,
+# so importing the app doesn't wait for torch and two model downloads.
+_loaded = {}
+_load_lock = threading.Lock()
+load_seconds = {}
+
+
+def _get(name: str, loader):
+    model = _loaded.get(name)
+    if model is None:
+        with _load_lock:
+            model = _loaded.get(name)
+            if model is None:
+                start = time.perf_counter()
+                model = loader()
+                load_seconds[name] = time.perf_counter() - start
+                _loaded[name] = model
+    return model
+
+
+def get_bi_encoder() -> "SentenceTransformer":
+    return _get("bi_encoder", load_bi_encoder)
+
+
+def get_cross_encoder() -> "CrossEncoder":
+    return _get("cross_encoder", load_cross_encoder)
+
+
+def models_loaded() -> bool:
+    return {"bi_encoder", "cross_encoder"} <= _loaded.keys()
@@ -1,46 +1,48 @@
-import requests
 from dotenv import load_dotenv
 load_dotenv()
+import asyncio
 import os
 import json
-from pathlib import Path
+import re
+from http_client import PERPLEXITY_CHAT_URL, post_json, apost_json
+from rate_limit import limiter
+from rerank import text_hash
+from resume_profile import user_resume_profile
+from ttl_cache import TTLCache
 # Replace with your actual Perplexity API key
 API_KEY = os.getenv("PERPLEXITY_API_KEY")
 
-# Resume data directory
-RESUME_DIR = Path("data/resumes")
-
 def load_user_resume(user_id: str) -> str:
-    """Load user resume from the resume database."""
-    resume_file = RESUME_DIR / f"{user_id}.json"
-    if not resume_file.exists():
-        return ""
-    
-    try:
-        with open(resume_file, 'r') as f:
-            resume_data = json.load(f)
-            return resume_data.get('resume_text', '')
-    except Exception as e:
-        print(f"Error loading resume: {e}")
-        return ""
+    """One-line summary of the user's resume profile (roles, experience, skills), or "" without a resume."""
+    profile = user_resume_profile(user_id)
+    return profile.summary() if profile else ""
 
-def search_job_news(topic: str, user_id: str = None):
-    """
-    Search for relevant news relating to job search or upskilling
-    for a given topic using the Perplexity API.
-    """
-    url = "https://api.perplexity.ai/chat/completions"
+def news_cache_key(topic: str, resume_text: str) -> tuple[str, str]:
+    """Topic lower-cased with punctuation and extra spaces removed, plus a hash of the background it's tailored to."""
+    normalized = " ".join(re.sub(r"[^\w\s+#]", " ", topic.lower()).split())
+    return normalized, text_hash(resume_text) if resume_text else ""
+
+
+# Answers that were errors aren't cached, so the next request tries again
+news_cache = TTLCache(
+    "news",
+    max_size=int(os.getenv("NEWS_CACHE_SIZE", 1000)),
+    ttl=float(os.getenv("NEWS_CACHE_TTL_SECONDS", 3600)),
+    stale_ttl=float(os.getenv("NEWS_CACHE_STALE_SECONDS", 3600)),
+    cacheable=lambda answer: isinstance(answer, str) and not answer.startswith("Error "),
+)
+
+
+def build_news_request(topic: str, resume_text: str = "") -> tuple[dict, dict]:
+    """Headers and payload of the Perplexity request for news on a topic."""
     headers = {
         "Authorization": f"Bearer {API_KEY}",
         "Content-Type": "application/json",
     }
 
-    # Load user resume if user_id provided
     resume_context = ""
-    if user_id:
-        resume_text = load_user_resume(user_id)
-        if resume_text:
-            resume_context = f"\n\nUser's background: {resume_text}"
+    if resume_text:
+        resume_context = f"\n\nUser's background: {resume_text}"
     
     # We explicitly request "news" relevance in the prompt
     payload = {
@@ -57,16 +59,48 @@ def search_job_news(topic: str, user_id: str = None):
         ],
         "temperature": 0.2,
     }
+    return headers, payload
 
-    response = requests.post(url, headers=headers, json=payload)
-    
-    if response.status_code == 200:
-        result = response.json()
+
+def parse_news_response(status_code: int, body: str) -> str:
+    if status_code == 200:
+        result = json.loads(body)
         # Extract the content of the assistant's reply
         answer = result["choices"][0]["message"]["content"]
         return answer
     else:
-        return f"Error {response.status_code}: {response.text}"
+        return f"Error {status_code}: {body}"
+
+
+def search_job_news(topic: str, user_id: str = None):
+    """
+    Search for relevant news relating to job search or upskilling
+    for a given topic using the Perplexity API.
+    Answers are cached per topic and background (see news_cache).
+    """
+    # Load user resume if user_id provided
+    resume_text = load_user_resume(user_id) if user_id else ""
+
+    def fetch():
+        headers, payload = build_news_request(topic, resume_text)
+        with limiter("perplexity").slot(user_id or ""):
+            response = post_json(PERPLEXITY_CHAT_URL, payload, headers=headers)
+        return parse_news_response(response.status_code, response.text)
+
+    return news_cache.get_or_load(news_cache_key(topic, resume_text), fetch)
+
+
+async def asearch_job_news(topic: str, user_id: str = None):
+    """search_job_news for the event loop."""
+    resume_text = await asyncio.to_thread(load_user_resume, user_id) if user_id else ""
+
+    async def fetch():
+        headers, payload = build_news_request(topic, resume_text)
+        async with limiter("perplexity").aslot(user_id or ""):
+            response = await apost_json(PERPLEXITY_CHAT_URL, payload, headers=headers)
+        return parse_news_response(response.status_code, response.text)
+
+    return await news_cache.aget_or_load(news_cache_key(topic, resume_text), fetch)
 
 
 if __name__ == "__main__":
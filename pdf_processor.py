@@ -5,6 +5,9 @@ import io
 import pandas as pd
 from datetime import datetime
 
+from resume_profile import resume_profiles
+from resume_vectors import resume_vectors
+
 RESUMES_DIR = Path("data/resumes")
 USERS_FILE = Path("data/users.csv")
 
@@ -73,6 +76,13 @@ def process_pdf_resume(user_id: str, pdf_bytes: bytes) -> bool:
     success = save_resume_to_file(user_id, resume_text)
     
     if success:
+        # Built once here so prompts don't carry the raw extraction and job search
+        # doesn't encode the resume; both are rebuilt on demand if this fails
+        try:
+            resume_profiles.build(user_id, resume_text.strip())
+            resume_vectors.build(user_id, resume_text.strip())
+        except Exception as e:
+            print(f"Failed to build resume profile or embeddings for {user_id}: {e}")
         print(f"Registering user: {user_id}")
         register_user(user_id)
         print(f"User {user_id} registered")
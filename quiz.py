@@ -1,64 +1,25 @@
-import requests
 from dotenv import load_dotenv
+import asyncio
 import json
-import csv
 import os
-from pathlib import Path
-from datetime import datetime, timedelta
+from http_client import PERPLEXITY_CHAT_URL, post_json, apost_json
+from quiz_history import quiz_history
+from rate_limit import limiter
+from resume_profile import compact_resume
 load_dotenv()
 
 API_KEY = os.getenv("PERPLEXITY_API_KEY")
 
-# Quiz data directory
-QUIZ_DIR = Path("data/quizzes")
-
 def load_user_past_questions(user_id: str, days_back: int = 30) -> list[str]:
     """Load past questions for a user from the last N days."""
-    quiz_file = QUIZ_DIR / f"{user_id}.csv"
-    if not quiz_file.exists():
-        return []
-    
-    cutoff_date = datetime.now() - timedelta(days=days_back)
-    past_questions = []
-    
-    try:
-        with open(quiz_file, 'r', newline='') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                question_date = datetime.fromisoformat(row['timestamp'])
-                if question_date > cutoff_date:
-                    past_questions.append(row['question_text'])
-    except Exception as e:
-        print(f"Error loading past questions: {e}")
-    
-    return past_questions
+    return quiz_history.past_questions(user_id, days_back)
 
 def save_user_quiz_questions(user_id: str, questions: list[str]):
-    quiz_file = QUIZ_DIR / f"{user_id}.csv"
-    
-    if not quiz_file.exists():
-        QUIZ_DIR.mkdir(parents=True, exist_ok=True)
-        with open(quiz_file, 'w', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow(['question_text', 'timestamp'])
-    
-    timestamp = datetime.now().isoformat()
-    try:
-        with open(quiz_file, 'a', newline='') as f:
-            writer = csv.writer(f)
-            for question in questions:
-                writer.writerow([question, timestamp])
-    except Exception as e:
-        print(f"Error saving quiz questions: {e}")
+    quiz_history.record(user_id, questions)
 
 
-def generate_quiz_questions(user_id: str, resume: str, role: str, past_questions: list[str]) -> list[str]:
-    """
-    Generate quiz/interview questions tailored to a candidate's resume and a job role.
-    Avoids repeating previously asked questions.
-    Returns a Python list of new questions.
-    """
-    url = "https://api.perplexity.ai/chat/completions"
+def build_quiz_request(resume: str, role: str, past_questions: list[str], count: int = 5) -> tuple[dict, dict]:
+    """Headers and payload of the Perplexity request for quiz questions."""
     headers = {
         "Authorization": f"Bearer {API_KEY}",
         "Content-Type": "application/json",
@@ -71,12 +32,12 @@ You are an expert interviewer. Your task is to generate quiz-style or interview-
 tailored to the following job role and candidate resume.
 
 Role: {role}
-Resume: {resume}
+Resume: {compact_resume(resume)}
 
 The following questions were already asked, do NOT repeat them:
 {past_q_str}
 
-Return exactly 5 NEW questions in valid JSON format as a Python list of strings. 
+Return exactly {count} NEW questions in valid JSON format as a Python list of strings. 
 Do not include explanations, only the JSON list.
 Example:
 ["Question 1?", "Question 2?", "Question 3?", "Question 4?", "Question 5?"]
@@ -90,27 +51,90 @@ Example:
         ],
         "temperature": 0.4  # factual + role-relevant
     }
+    return headers, payload
+
 
-    response = requests.post(url, headers=headers, json=payload)
+class QuizGenerationError(Exception):
+    """The API call failed or its answer wasn't a list of questions; `result` is what callers used to get back."""
 
-    if response.status_code == 200:
-        result = response.json()
+    def __init__(self, result: list[str]):
+        super().__init__(result[0])
+        self.result = result
+
+
+def parse_quiz_response(status_code: int, body: str) -> list[str]:
+    if status_code == 200:
+        result = json.loads(body)
         content = result["choices"][0]["message"]["content"]
 
         try:
             questions = json.loads(content)
             if isinstance(questions, list):
-                # Save questions to user's quiz file if user_id provided
-                if user_id:
-                    save_user_quiz_questions(user_id, questions)
                 return questions
             else:
                 raise ValueError("Model did not return a list.")
         except Exception as e:
-            return [f"Error parsing response: {e}", content]
+            raise QuizGenerationError([f"Error parsing response: {e}", content])
 
     else:
-        return [f"Error {response.status_code}: {response.text}"]
+        raise QuizGenerationError([f"Error {status_code}: {body}"])
+
+
+def _unique_questions(user_id: str, questions: list[str], past_questions: list[str]) -> list[str]:
+    new_questions = quiz_history.filter_new(user_id, questions, also_against=past_questions)
+    if not new_questions:
+        raise QuizGenerationError(["Error: the generated questions all repeat ones already asked"])
+    return new_questions
+
+
+def request_quiz_questions(user_id: str, resume: str, role: str, past_questions: list[str] = None, count: int = 5) -> list[str]:
+    """New questions from the API, not yet recorded as asked; raises QuizGenerationError.
+
+    The prompt lists a bounded slice of the user's history rather than all of
+    it, and answers that repeat anything already asked (or in past_questions)
+    are dropped locally by embedding similarity.
+    """
+    prompt_questions = quiz_history.prompt_slice(user_id, role, extra=past_questions)
+    headers, payload = build_quiz_request(resume, role, prompt_questions, count)
+    with limiter("perplexity").slot(user_id or ""):
+        response = post_json(PERPLEXITY_CHAT_URL, payload, headers=headers)
+    return _unique_questions(user_id, parse_quiz_response(response.status_code, response.text), past_questions)
+
+
+async def arequest_quiz_questions(user_id: str, resume: str, role: str, past_questions: list[str] = None, count: int = 5) -> list[str]:
+    prompt_questions = await asyncio.to_thread(quiz_history.prompt_slice, user_id, role, past_questions)
+    headers, payload = build_quiz_request(resume, role, prompt_questions, count)
+    async with limiter("perplexity").aslot(user_id or ""):
+        response = await apost_json(PERPLEXITY_CHAT_URL, payload, headers=headers)
+    questions = parse_quiz_response(response.status_code, response.text)
+    return await asyncio.to_thread(_unique_questions, user_id, questions, past_questions)
+
+
+def generate_quiz_questions(user_id: str, resume: str, role: str, past_questions: list[str] = None) -> list[str]:
+    """
+    Generate quiz/interview questions tailored to a candidate's resume and a job role.
+    Avoids repeating previously asked questions.
+    Returns a Python list of new questions.
+    """
+    try:
+        questions = request_quiz_questions(user_id, resume, role, past_questions)
+    except QuizGenerationError as e:
+        return e.result
+    # Save questions to user's quiz file if user_id provided
+    if user_id:
+        save_user_quiz_questions(user_id, questions)
+    return questions
+
+
+async def agenerate_quiz_questions(user_id: str, resume: str, role: str, past_questions: list[str] = None) -> list[str]:
+    """generate_quiz_questions for the event loop: the API call is awaited and the save runs on a thread."""
+    try:
+        questions = await arequest_quiz_questions(user_id, resume, role, past_questions)
+    except QuizGenerationError as e:
+        return e.result
+    if user_id:
+        await asyncio.to_thread(save_user_quiz_questions, user_id, questions)
+    return questions
 
 
 if __name__ == "__main__":
@@ -0,0 +1,195 @@
+import csv
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from inference import encode_texts
+
+logger = logging.getLogger(__name__)
+
+# Quiz data directory
+QUIZ_DIR = Path("data/quizzes")
+
+HISTORY_DAYS = 30
+PROMPT_PAST_QUESTIONS = int(os.getenv("QUIZ_PROMPT_PAST_QUESTIONS", 20))
+DUPLICATE_THRESHOLD = float(os.getenv("QUIZ_DUPLICATE_THRESHOLD", 0.9))
+CACHE_USERS = int(os.getenv("QUIZ_HISTORY_CACHE_USERS", 1000))
+
+
+def _file_version(path: Path):
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+class QuizHistory:
+    """Each user's asked questions, indexed by time, with an embedding per question.
+
+    `data/quizzes/<user>.csv` is the record of what has been asked; it is read
+    once into a question array and a sorted datetime64 array, so a date window
+    is a binary search instead of parsing every row. Question embeddings are
+    kept in a `<user>.vectors.npy` sidecar aligned with the CSV rows and only
+    new rows are encoded. That lets the prompt carry a bounded slice of the
+    history (the most recent and the most relevant to the role), while
+    near-duplicates of anything already asked are rejected locally.
+    """
+
+    def __init__(self, quiz_dir: Path = QUIZ_DIR, cache_users: int = CACHE_USERS):
+        self.quiz_dir = quiz_dir
+        self.cache_users = cache_users
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.rejected_duplicates = 0
+
+    def _csv(self, user_id: str) -> Path:
+        return self.quiz_dir / f"{user_id}.csv"
+
+    def _sidecar(self, user_id: str) -> Path:
+        return self.quiz_dir / f"{user_id}.vectors.npy"
+
+    def _load(self, user_id: str) -> Dict[str, Any]:
+        quiz_file = self._csv(user_id)
+        version = _file_version(quiz_file)
+        with self._lock:
+            entry = self._cache.get(user_id)
+            if entry is not None and entry["version"] == version:
+                self._cache.move_to_end(user_id)
+                return entry
+
+        questions = np.array([], dtype=object)
+        asked_at = np.array([], dtype='datetime64[us]')
+        if version is not None:
+            try:
+                rows = pd.read_csv(quiz_file, dtype=str, keep_default_na=False)
+                questions = rows['question_text'].to_numpy(dtype=object)
+                asked_at = pd.to_datetime(rows['timestamp'], errors='coerce', format='ISO8601').to_numpy(dtype='datetime64[us]')
+            except Exception as e:
+                logger.error(f"Error loading past questions for {user_id}: {e}")
+        # Rows are appended in time order; sort anyway in case the file was edited
+        order = np.argsort(asked_at, kind='stable')
+        entry = {"version": version, "questions": questions[order], "asked_at": asked_at[order],
+                 "row_order": order, "vectors": None}
+        with self._lock:
+            self._cache[user_id] = entry
+            self._cache.move_to_end(user_id)
+            while len(self._cache) > self.cache_users:
+                self._cache.popitem(last=False)
+        return entry
+
+    def _vectors(self, user_id: str, entry: Dict[str, Any]) -> np.ndarray:
+        """Embeddings of the user's questions in `entry` order, encoding only rows the sidecar lacks."""
+        if entry["vectors"] is not None:
+            return entry["vectors"]
+        count = len(entry["questions"])
+        sidecar = self._sidecar(user_id)
+        stored = np.load(sidecar) if sidecar.exists() else np.zeros((0, 0), dtype='float32')
+        if len(stored) > count:
+            stored = stored[:0]  # the CSV was rewritten; start over
+        # The sidecar is in CSV row order; entry arrays are in time order
+        by_row = np.empty(count, dtype=object)
+        by_row[entry["row_order"]] = entry["questions"]
+        if len(stored) < count:
+            new = encode_texts(list(by_row[len(stored):]))
+            stored = new if len(stored) == 0 else np.vstack([stored, new])
+            # A unique temp name, so concurrent writers never share (and truncate) one file
+            with tempfile.NamedTemporaryFile(dir=sidecar.parent, prefix=f".{sidecar.name}.", delete=False) as f:
+                np.save(f, stored)
+            os.replace(f.name, sidecar)
+        entry["vectors"] = stored[entry["row_order"]] if count else stored
+        return entry["vectors"]
+
+    def past_questions(self, user_id: str, days_back: int = HISTORY_DAYS) -> List[str]:
+        """Questions asked in the last `days_back` days, oldest first."""
+        entry = self._load(user_id)
+        cutoff = np.datetime64(datetime.now() - timedelta(days=days_back), 'us')
+        start = np.searchsorted(entry["asked_at"], cutoff, side='right')
+        return list(entry["questions"][start:])
+
+    def prompt_slice(self, user_id: str, role: str, extra: Optional[List[str]] = None,
+                     limit: int = PROMPT_PAST_QUESTIONS) -> List[str]:
+        """At most `limit` past questions to show the model: half the most recent, half the closest to the role."""
+        entry = self._load(user_id)
+        questions = list(entry["questions"])
+        recent = list(dict.fromkeys(list(extra or []) + questions[::-1]))[:max(1, limit // 2)]
+        chosen = list(recent)
+        if len(questions) > len(recent):
+            try:
+                vectors = self._vectors(user_id, entry)
+                similarities = vectors @ encode_texts([role])[0]
+                for i in np.argsort(-similarities):
+                    if len(chosen) >= limit:
+                        break
+                    if questions[i] not in chosen:
+                        chosen.append(questions[i])
+            except Exception:
+                logger.exception("Could not rank past questions by relevance")
+        return chosen[:limit]
+
+    def filter_new(self, user_id: str, candidates: List[str], also_against: Optional[List[str]] = None,
+                   threshold: float = DUPLICATE_THRESHOLD) -> List[str]:
+        """Drop candidates that repeat, or nearly repeat, a past question, `also_against` or each other."""
+        candidates = [question for question in dict.fromkeys(candidates) if isinstance(question, str) and question.strip()]
+        if not candidates:
+            return []
+        entry = self._load(user_id)
+        try:
+            candidate_vectors = encode_texts(candidates)
+            known = [self._vectors(user_id, entry)]
+            if also_against:
+                known.append(encode_texts(list(also_against)))
+            known = [vectors for vectors in known if len(vectors)]
+            reference = np.vstack(known) if known else np.zeros((0, candidate_vectors.shape[1]), dtype='float32')
+        except Exception:
+            logger.exception("Could not embed quiz questions; falling back to exact duplicate checks")
+            seen = set(entry["questions"]) | set(also_against or [])
+            return [question for question in candidates if question not in seen]
+
+        kept, kept_vectors = [], []
+        for question, vector in zip(candidates, candidate_vectors):
+            pool = reference if not kept_vectors else np.vstack([reference, np.array(kept_vectors)])
+            if len(pool) and float((pool @ vector).max()) >= threshold:
+                self.rejected_duplicates += 1
+                continue
+            kept.append(question)
+            kept_vectors.append(vector)
+        return kept
+
+    def record(self, user_id: str, questions: List[str]):
+        """Append questions to the user's quiz CSV as asked now."""
+        quiz_file = self._csv(user_id)
+        if not quiz_file.exists():
+            self.quiz_dir.mkdir(parents=True, exist_ok=True)
+            with open(quiz_file, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['question_text', 'timestamp'])
+
+        timestamp = datetime.now().isoformat()
+        try:
+            with open(quiz_file, 'a', newline='') as f:
+                writer = csv.writer(f)
+                for question in questions:
+                    writer.writerow([question, timestamp])
+        except Exception as e:
+            logger.error(f"Error saving quiz questions: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'cached_users': len(self._cache),
+                'prompt_past_questions': PROMPT_PAST_QUESTIONS,
+                'duplicate_threshold': DUPLICATE_THRESHOLD,
+                'rejected_duplicates': self.rejected_duplicates,
+            }
+
+
+quiz_history = QuizHistory()
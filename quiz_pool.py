@@ -0,0 +1,173 @@
+import logging
+import os
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Tuple
+
+from quiz import QuizGenerationError, request_quiz_questions, save_user_quiz_questions
+from quiz_history import quiz_history
+
+logger = logging.getLogger(__name__)
+
+QUIZ_POOL_SIZE = int(os.getenv("QUIZ_POOL_SIZE", 15))
+QUIZ_POOL_LOW_WATER = int(os.getenv("QUIZ_POOL_LOW_WATER", 5))
+QUIZ_POOL_REFILL_WORKERS = int(os.getenv("QUIZ_POOL_REFILL_WORKERS", 2))
+QUIZ_POOL_MAX_POOLS = int(os.getenv("QUIZ_POOL_MAX_POOLS", 1000))
+# How long a quiz that missed the pool waits for the refill it triggered
+QUIZ_POOL_WAIT_SECONDS = float(os.getenv("QUIZ_POOL_WAIT_SECONDS", 55))
+QUIZ_REFILL_BATCH = 10  # most questions asked of the API in one refill
+
+
+def normalize_role(role: str) -> str:
+    return " ".join(role.lower().split())
+
+
+class QuizPool:
+    """Questions generated ahead of time per (user, role), so a quiz needn't wait on the API.
+
+    A pool holds questions that have been generated but not yet asked. Taking
+    questions records them in the user's quiz CSV, which stays the record of
+    what has been asked; pooled questions that repeat or nearly repeat it (or
+    the caller's past questions) are dropped. When a pool drops below the
+    low-water mark, a background worker asks the API for enough questions to
+    top it up, telling it about both the asked and the still-pooled ones and
+    dropping near-duplicates. A take that misses waits for that refill and is
+    served from it, so the miss costs one API call rather than two.
+    """
+
+    def __init__(self, size: int = QUIZ_POOL_SIZE, low_water: int = QUIZ_POOL_LOW_WATER,
+                 refill_workers: int = QUIZ_POOL_REFILL_WORKERS, max_pools: int = QUIZ_POOL_MAX_POOLS):
+        self.size = size
+        self.low_water = low_water
+        self.max_pools = max_pools
+        self._pools: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+        self._refilling: Dict[Tuple[str, str], Future] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=refill_workers, thread_name_prefix="quiz-refill")
+        self.refill_workers = refill_workers
+        self.hits = 0
+        self.misses = 0
+        self.refill_waits = 0
+        self.refills = 0
+        self.refill_errors = 0
+
+    def take(self, user_id: str, role: str, resume: str, count: int = 5,
+             past_questions: Optional[List[str]] = None, wait_seconds: float = QUIZ_POOL_WAIT_SECONDS) -> Optional[List[str]]:
+        """`count` unasked questions from the pool, recorded as asked, or None if it can't supply them.
+
+        On a miss this waits up to `wait_seconds` for the refill and takes from
+        it; None means the refill failed or came back short, and the caller can
+        ask the API itself without racing a refill.
+        """
+        key = (user_id, normalize_role(role))
+        taken, refill = self._take(key, role, resume, count, past_questions, refill_on_miss=True)
+        with self._lock:
+            if taken:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if taken is None and refill is not None and wait_seconds > 0:
+            with self._lock:
+                self.refill_waits += 1
+            done, _ = wait([refill], timeout=wait_seconds)
+            if done:
+                # No new refill on a second miss: the caller generates instead
+                taken, _ = self._take(key, role, resume, count, past_questions, refill_on_miss=False)
+            else:
+                logger.warning(f"Quiz pool refill for user {user_id}, role {key[1]!r} still running after {wait_seconds}s")
+
+        if taken:
+            save_user_quiz_questions(user_id, taken)
+        return taken
+
+    def _take(self, key: Tuple[str, str], role: str, resume: str, count: int,
+              past_questions: Optional[List[str]], refill_on_miss: bool) -> Tuple[Optional[List[str]], Optional[Future]]:
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is None:
+                pool = {"role": role, "resume": resume, "questions": deque()}
+                self._pools[key] = pool
+                while len(self._pools) > self.max_pools:
+                    self._pools.popitem(last=False)
+            self._pools.move_to_end(key)
+            pool["resume"] = resume
+            pooled = list(pool["questions"])
+
+        # Checked by embedding, not just exact match: the history may have gained
+        # a near-duplicate since these were generated
+        fresh = set(quiz_history.filter_new(key[0], pooled, also_against=past_questions)) if pooled else set()
+
+        with self._lock:
+            questions = pool["questions"]
+            for question in [question for question in questions if question in pooled and question not in fresh]:
+                questions.remove(question)
+            available = [question for question in questions if question in fresh]
+            taken = None
+            if len(available) >= count:
+                taken = available[:count]
+                for question in taken:
+                    questions.remove(question)
+            refill = None
+            if taken or refill_on_miss:
+                refill = self._schedule_refill(key, pool, 0 if taken else count)
+        return taken, refill
+
+    def _schedule_refill(self, key: Tuple[str, str], pool: Dict[str, Any], needed: int = 0) -> Optional[Future]:
+        """The running or newly started refill of a pool below the low-water mark (or `needed`), if any."""
+        # Called with the lock held
+        if key in self._refilling:
+            return self._refilling[key]
+        if len(pool["questions"]) < max(self.low_water, needed):
+            self._refilling[key] = self._executor.submit(self._refill, key, pool)
+            return self._refilling[key]
+        return None
+
+    def _refill(self, key: Tuple[str, str], pool: Dict[str, Any]):
+        user_id = key[0]
+        try:
+            with self._lock:
+                pooled = list(pool["questions"])
+                resume = pool["resume"]
+            missing = self.size - len(pooled)
+            if missing <= 0:
+                return
+            # The user's history is added, and near-duplicates of it dropped, by request_quiz_questions
+            new_questions = request_quiz_questions(user_id, resume, pool["role"], pooled,
+                                                   count=min(missing, QUIZ_REFILL_BATCH))
+            with self._lock:
+                known = set(pool["questions"])
+                pool["questions"].extend(question for question in new_questions
+                                         if isinstance(question, str) and question not in known)
+                self.refills += 1
+            logger.info(f"Refilled quiz pool for user {user_id}, role {key[1]!r}: {len(pool['questions'])} questions")
+        except QuizGenerationError as e:
+            self.refill_errors += 1
+            logger.warning(f"Quiz pool refill for user {user_id}, role {key[1]!r} failed: {e}")
+        except Exception:
+            self.refill_errors += 1
+            logger.exception(f"Quiz pool refill for user {user_id}, role {key[1]!r} failed")
+        finally:
+            with self._lock:
+                self._refilling.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            takes = self.hits + self.misses
+            return {
+                'pools': len(self._pools),
+                'pooled_questions': sum(len(pool["questions"]) for pool in self._pools.values()),
+                'pool_size': self.size,
+                'low_water': self.low_water,
+                'refill_workers': self.refill_workers,
+                'refilling': len(self._refilling),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / takes if takes else 0.0,
+                'refill_waits': self.refill_waits,
+                'refills': self.refills,
+                'refill_errors': self.refill_errors,
+            }
+
+
+quiz_pool = QuizPool()
@@ -0,0 +1,249 @@
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Deque, Dict, Optional
+
+import numpy as np
+
+STATS_WINDOW = 1000
+
+# Requests per second, burst size, concurrent requests, queued requests and
+# seconds a request may wait, per provider; each can be overridden with
+# RATE_LIMIT_<PROVIDER>_<SETTING>, e.g. RATE_LIMIT_OPENAI_RPS=20
+PROVIDER_DEFAULTS = {
+    "openai": {"rps": 10.0, "burst": 20, "max_concurrent": 32, "max_queue": 200, "max_wait": 30.0},
+    "perplexity": {"rps": 2.0, "burst": 5, "max_concurrent": 8, "max_queue": 100, "max_wait": 30.0},
+}
+
+
+class RateLimited(Exception):
+    """A provider's wait queue is full, or a request waited too long for its turn."""
+
+    def __init__(self, provider: str, retry_after: float):
+        super().__init__(f"{provider} is over capacity, retry in {retry_after:.0f}s")
+        self.provider = provider
+        self.retry_after = retry_after
+
+
+class _Ticket:
+    """A queued request; granting it wakes the waiting thread or coroutine."""
+
+    def __init__(self, user_id: str, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.user_id = user_id
+        self.queued_at = time.perf_counter()
+        self.granted = False
+        self.loop = loop
+        if loop is None:
+            self.event = threading.Event()
+        else:
+            self.future = loop.create_future()
+
+    def grant(self, limiter: "ProviderLimiter"):
+        self.granted = True
+        if self.loop is None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(self._resolve, limiter)
+
+    def _resolve(self, limiter: "ProviderLimiter"):
+        if self.future.done():
+            # The waiter was cancelled after being granted; hand the slot back
+            limiter.release()
+        else:
+            self.future.set_result(None)
+
+
+class ProviderLimiter:
+    """Token bucket plus concurrency cap in front of one provider, with fair queueing.
+
+    A request runs when a token is available and fewer than `max_concurrent`
+    requests are in flight. Otherwise it waits in its user's queue, and queues
+    are served round-robin so one user's burst can't starve everyone else. At
+    most `max_queue` requests wait; beyond that, or after `max_wait` seconds,
+    RateLimited is raised so callers shed load instead of piling up.
+    """
+
+    def __init__(self, name: str, rps: float, burst: int, max_concurrent: int, max_queue: int, max_wait: float):
+        self.name = name
+        self.rps = rps
+        self.burst = burst
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._refilled_at = time.monotonic()
+        self._in_flight = 0
+        self._queues: "OrderedDict[str, Deque[_Ticket]]" = OrderedDict()
+        self._queued = 0
+        self._timer: Optional[threading.Timer] = None
+        self._wait_ms = deque(maxlen=STATS_WINDOW)
+        self.granted = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    @classmethod
+    def from_env(cls, name: str) -> "ProviderLimiter":
+        settings = dict(PROVIDER_DEFAULTS.get(name, PROVIDER_DEFAULTS["openai"]))
+        for key, default in settings.items():
+            value = os.getenv(f"RATE_LIMIT_{name.upper()}_{key.upper()}")
+            if value is not None:
+                settings[key] = type(default)(value)
+        return cls(name, **settings)
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rps)
+        self._refilled_at = now
+
+    def retry_after(self) -> float:
+        """Rough seconds until a new request would get through."""
+        return max(1.0, math.ceil((self._queued + 1) / self.rps))
+
+    def overloaded(self) -> bool:
+        return self._queued >= self.max_queue
+
+    def _enqueue(self, user_id: str, loop=None) -> Optional[_Ticket]:
+        """Take a slot now (returns None) or queue a ticket; raises RateLimited if the queue is full."""
+        with self._lock:
+            self._refill()
+            if not self._queued and self._tokens >= 1 and self._in_flight < self.max_concurrent:
+                self._tokens -= 1
+                self._in_flight += 1
+                self.granted += 1
+                self._wait_ms.append(0.0)
+                return None
+            if self._queued >= self.max_queue:
+                self.rejected += 1
+                raise RateLimited(self.name, self.retry_after())
+            ticket = _Ticket(user_id, loop)
+            self._queues.setdefault(user_id, deque()).append(ticket)
+            self._queued += 1
+            self._dispatch()
+            return ticket
+
+    def _dispatch(self):
+        # Called with the lock held: grant waiting tickets round-robin across users
+        self._refill()
+        while self._queues and self._tokens >= 1 and self._in_flight < self.max_concurrent:
+            user_id, queue = next(iter(self._queues.items()))
+            ticket = queue.popleft()
+            if queue:
+                self._queues.move_to_end(user_id)
+            else:
+                del self._queues[user_id]
+            self._queued -= 1
+            self._tokens -= 1
+            self._in_flight += 1
+            self.granted += 1
+            self._wait_ms.append((time.perf_counter() - ticket.queued_at) * 1000)
+            ticket.grant(self)
+        if self._queues and self._tokens < 1 and self._timer is None:
+            # Out of tokens with requests waiting: come back when the next one is due
+            self._timer = threading.Timer((1 - self._tokens) / self.rps, self._on_timer)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _on_timer(self):
+        with self._lock:
+            self._timer = None
+            self._dispatch()
+
+    def _abandon(self, ticket: _Ticket) -> bool:
+        """Drop a ticket that gave up waiting; False if it was granted in the meantime."""
+        with self._lock:
+            if ticket.granted:
+                return False
+            queue = self._queues.get(ticket.user_id)
+            if queue is not None and ticket in queue:
+                queue.remove(ticket)
+                self._queued -= 1
+                if not queue:
+                    del self._queues[ticket.user_id]
+            return True
+
+    def release(self):
+        with self._lock:
+            self._in_flight -= 1
+            self._dispatch()
+
+    def acquire(self, user_id: str):
+        ticket = self._enqueue(user_id)
+        if ticket is not None and not ticket.event.wait(self.max_wait) and self._abandon(ticket):
+            self.timed_out += 1
+            raise RateLimited(self.name, self.retry_after())
+
+    async def aacquire(self, user_id: str):
+        ticket = self._enqueue(user_id, asyncio.get_running_loop())
+        if ticket is None:
+            return
+        try:
+            await asyncio.wait_for(asyncio.shield(ticket.future), self.max_wait)
+        except asyncio.TimeoutError:
+            if self._abandon(ticket):
+                self.timed_out += 1
+                raise RateLimited(self.name, self.retry_after())
+            await ticket.future
+        except asyncio.CancelledError:
+            if not self._abandon(ticket):
+                # Granted while being cancelled: the slot is ours, so give it back
+                if ticket.future.done():
+                    self.release()
+                else:
+                    ticket.future.cancel()
+            raise
+
+    @contextmanager
+    def slot(self, user_id: str):
+        self.acquire(user_id)
+        try:
+            yield
+        finally:
+            self.release()
+
+    @asynccontextmanager
+    async def aslot(self, user_id: str):
+        await self.aacquire(user_id)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._refill()
+            wait_ms = np.array(self._wait_ms or [0.0])
+            return {
+                'rps': self.rps,
+                'max_concurrent': self.max_concurrent,
+                'max_queue': self.max_queue,
+                'in_flight': self._in_flight,
+                'queued': self._queued,
+                'queued_users': len(self._queues),
+                'tokens': round(self._tokens, 2),
+                'granted': self.granted,
+                'rejected': self.rejected,
+                'timed_out': self.timed_out,
+                'wait_ms_p50': float(np.percentile(wait_ms, 50)),
+                'wait_ms_p95': float(np.percentile(wait_ms, 95)),
+            }
+
+
+_limiters: Dict[str, ProviderLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def limiter(provider: str) -> ProviderLimiter:
+    """The process-wide limiter for a provider."""
+    with _limiters_lock:
+        if provider not in _limiters:
+            _limiters[provider] = ProviderLimiter.from_env(provider)
+        return _limiters[provider]
+
+
+def stats() -> Dict[str, Dict[str, Any]]:
+    return {name: provider.stats() for name, provider in list(_limiters.items())}
@@ -0,0 +1,122 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Sequence, Tuple
+
+RERANK_MODES = ("full", "cascade", "off")
+
+
+@dataclass
+class RerankConfig:
+    """How much cross-encoder work a job search is allowed to spend."""
+    mode: str = "cascade"
+    candidates: int = 20       # bi-encoder candidates passed to the cross-encoder in cascade mode
+    margin: float = 0.1        # skip the cross-encoder if the k-th and (k+1)-th bi-encoder scores differ by this much
+    max_chars: int = 2000      # query and job text are cut to this many characters before scoring
+    cache_size: int = 20000
+
+    @classmethod
+    def from_env(cls) -> "RerankConfig":
+        config = cls(
+            mode=os.getenv("JOB_RERANK_MODE", cls.mode),
+            candidates=int(os.getenv("JOB_RERANK_CANDIDATES", cls.candidates)),
+            margin=float(os.getenv("JOB_RERANK_MARGIN", cls.margin)),
+            max_chars=int(os.getenv("JOB_RERANK_MAX_CHARS", cls.max_chars)),
+            cache_size=int(os.getenv("JOB_RERANK_CACHE_SIZE", cls.cache_size)),
+        )
+        if config.mode not in RERANK_MODES:
+            raise ValueError(f"JOB_RERANK_MODE must be one of {RERANK_MODES}, got {config.mode!r}")
+        return config
+
+
+def text_hash(text: str) -> str:
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).hexdigest()
+
+
+class RerankCache:
+    """LRU cache of cross-encoder scores keyed by (query hash, job_id).
+
+    The job text hash is stored with each score, so an edited job is rescored
+    instead of served a stale entry.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._scores: "OrderedDict[Tuple[str, str], Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, query_key: str, job_id: str, job_key: str):
+        with self._lock:
+            entry = self._scores.get((query_key, job_id))
+            if entry is None or entry[0] != job_key:
+                self.misses += 1
+                return None
+            self._scores.move_to_end((query_key, job_id))
+            self.hits += 1
+            return entry[1]
+
+    def put(self, query_key: str, job_id: str, job_key: str, score: float):
+        with self._lock:
+            self._scores[(query_key, job_id)] = (job_key, score)
+            self._scores.move_to_end((query_key, job_id))
+            while len(self._scores) > self.max_size:
+                self._scores.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+
+class CascadeReranker:
+    """Orders bi-encoder candidates, spending cross-encoder calls only where they can change the result.
+
+    In cascade mode the cross-encoder is skipped when the bi-encoder already
+    separates the top_k from the rest by `margin`; otherwise only the best
+    `candidates` are scored, with trimmed texts and cached scores. A pool of at
+    most top_k candidates has no margin to check and is always scored.
+    """
+
+    def __init__(self, predict: Callable[[List[List[str]]], Sequence[float]], config: RerankConfig):
+        self.predict = predict
+        self.config = config
+        self.cache = RerankCache(config.cache_size)
+
+    def rerank(self, query: str, job_ids: List[str], job_texts: List[str],
+               bi_scores: Sequence[float], top_k: int) -> Tuple[List[int], Dict[int, float]]:
+        """Return candidate positions in ranked order and the cross-encoder score of each scored one.
+
+        Candidates must be given in descending bi-encoder score order.
+        """
+        order = list(range(len(job_ids)))
+        if len(order) <= 1 or self.config.mode == "off":
+            return order, {}
+
+        if self.config.mode == "cascade":
+            # A pool no bigger than top_k is all returned, but still needs ordering
+            if len(order) > top_k and bi_scores[top_k - 1] - bi_scores[top_k] >= self.config.margin:
+                return order, {}
+            pool = order[:max(top_k, self.config.candidates)]
+        else:
+            pool = order
+
+        scores = self._score(query, [job_ids[i] for i in pool], [job_texts[i] for i in pool])
+        rerank_scores = dict(zip(pool, scores))
+        pool.sort(key=lambda i: rerank_scores[i], reverse=True)
+        return pool + order[len(pool):], rerank_scores
+
+    def _score(self, query: str, job_ids: List[str], job_texts: List[str]) -> List[float]:
+        query_key = text_hash(query)
+        job_keys = [text_hash(text) for text in job_texts]
+        scores = [self.cache.get(query_key, job_id, job_key) for job_id, job_key in zip(job_ids, job_keys)]
+
+        missing = [i for i, score in enumerate(scores) if score is None]
+        if missing:
+            max_chars = self.config.max_chars
+            pairs = [[query[:max_chars], job_texts[i][:max_chars]] for i in missing]
+            for i, score in zip(missing, self.predict(pairs)):
+                scores[i] = float(score)
+                self.cache.put(query_key, job_ids[i], job_keys[i], scores[i])
+        return scores
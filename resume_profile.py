@@ -0,0 +1,332 @@
+import json
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from rerank import text_hash
+
+logger = logging.getLogger(__name__)
+
+RESUMES_DIR = Path("data/resumes")
+
+# Bump when extraction changes so stored profiles are rebuilt
+PROFILE_VERSION = 1
+PROFILE_TEXT_CHARS = int(os.getenv("RESUME_PROFILE_CHARS", 2000))
+PROFILE_CACHE_SIZE = int(os.getenv("RESUME_PROFILE_CACHE_SIZE", 1000))
+MAX_SKILLS = 30
+NEWS_SKILLS = 12
+
+SECTION_HEADERS = (
+    "Professional Experience", "Work Experience", "Experience", "Employment History",
+    "Projects", "Education", "Technical Skills", "Additional Skills", "Skills",
+    "Certifications", "Publications", "Academic Papers", "Achievements", "Summary",
+)
+_SECTION = re.compile(r"(?<![\w:])(" + "|".join(re.escape(header) for header in SECTION_HEADERS) + r")(?![\w:])")
+
+_MONTH = r"(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Sept|Oct|Nov|Dec)[a-z]*\.?"
+_DATE_RANGE = re.compile(
+    rf"(?:({_MONTH})\s+)?((?:19|20)\d\d)\s*[–—-]\s*"
+    rf"(?:(Present|Current|Now|Today)|(?:({_MONTH})\s+)?((?:19|20)\d\d))",
+    re.IGNORECASE,
+)
+_MONTHS = ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"]
+
+_CONTACT = re.compile(
+    r"\S+@\S+\.\w+"                                   # e-mail addresses
+    r"|(?:https?://)?(?:www\.)?(?:linkedin|github)\.com/\S*"
+    r"|https?://\S+"
+    r"|\+\d[\d\s()-]{7,}\d|\(\d{3}\)\s*\d{3}-\d{4}|\b\d{10}\b"   # phone numbers
+)
+
+# Common skills picked out of free text; lists under a "Skills:"-style label are taken as written
+SKILL_TERMS = (
+    "Python", "Java", "JavaScript", "TypeScript", "C++", "C#", "Go", "Rust", "Scala", "Kotlin", "Swift", "R",
+    "SQL", "NoSQL", "PostgreSQL", "MySQL", "MongoDB", "Redis", "Elasticsearch", "Kafka", "RabbitMQ", "Spark",
+    "Hadoop", "Airflow", "dbt", "Snowflake", "BigQuery", "AWS", "GCP", "Azure", "Docker", "Kubernetes",
+    "Terraform", "Linux", "Git", "CI/CD", "REST", "GraphQL", "FastAPI", "Django", "Flask", "React", "Node.js",
+    "TensorFlow", "PyTorch", "Keras", "scikit-learn", "Pandas", "NumPy", "OpenCV", "LangChain", "LangGraph",
+    "Hugging Face", "Transformers", "LLM", "NLP", "Computer Vision", "Machine Learning", "Deep Learning",
+    "Reinforcement Learning", "Data Analysis", "Statistics", "Time Series", "Tableau", "Power BI", "Excel",
+)
+_SKILL_TERM = re.compile(
+    r"(?<![\w+#/.-])(" + "|".join(re.escape(term) for term in sorted(SKILL_TERMS, key=len, reverse=True)) + r")(?![\w+#/-])",
+    re.IGNORECASE,
+)
+_SKILL_LIST = re.compile(r"(?:Languages|Libraries|Frameworks|Tools|Technologies|Technical Stacks?|Technical Expertise|Skills)\s*:\s*([^\n:]+)")
+_SKILL_NAMES = {term.lower(): term for term in SKILL_TERMS}
+
+
+def clean_resume_text(raw: str) -> str:
+    """PDF-extracted resume text as plain prose.
+
+    PyPDF2 gives roughly one word per line, so whitespace is collapsed, the
+    spaces it leaves before punctuation are dropped and bullets start new lines.
+    """
+    text = " ".join(raw.split())
+    text = re.sub(r"\s+([,.;:!?)%])", r"\1", text)
+    text = re.sub(r"\s*[●•▪◦]\s*", "\n- ", text)
+    return text.strip()
+
+
+def _sections(text: str) -> Dict[str, str]:
+    """Text under each known header, by header; text before the first one is under ""."""
+    sections: Dict[str, str] = {}
+    parts = _SECTION.split(text)
+    sections[""] = parts[0]
+    for header, body in zip(parts[1::2], parts[2::2]):
+        sections.setdefault(header, body)
+    return sections
+
+
+def _month_index(year: str, month: Optional[str], default: int) -> int:
+    number = _MONTHS.index(month[:3].lower()) if month else default
+    return int(year) * 12 + number
+
+
+def _experience_ranges(experience: str, today: date) -> List[tuple]:
+    ranges = []
+    for start_month, start_year, present, end_month, end_year in _DATE_RANGE.findall(experience):
+        start = _month_index(start_year, start_month, 0)
+        end = today.year * 12 + today.month - 1 if present else _month_index(end_year, end_month, 11)
+        if end >= start:
+            ranges.append((start, end + 1))
+    return ranges
+
+
+def years_of_experience(experience: str, today: Optional[date] = None) -> Optional[float]:
+    """Years covered by the date ranges in an experience section, overlapping jobs counted once."""
+    ranges = sorted(_experience_ranges(experience, today or date.today()))
+    if not ranges:
+        return None
+    months, covered_to = 0, None
+    for start, end in ranges:
+        if covered_to is not None:
+            start = max(start, covered_to)
+        if end > start:
+            months += end - start
+        covered_to = end if covered_to is None else max(covered_to, end)
+    return round(months / 12, 1)
+
+
+def extract_roles(experience: str) -> List[str]:
+    """Job titles: the words between a date range and the first bullet of each entry."""
+    roles = []
+    for match in re.finditer(rf"{_DATE_RANGE.pattern}\s+([^\n|]{{2,60}}?)\s*(?:\n- |$)", experience, re.IGNORECASE):
+        title = match.group(6).strip(" ,;-–")
+        if title and len(title.split()) <= 6 and title.lower() not in (role.lower() for role in roles):
+            roles.append(title)
+    return roles
+
+
+def extract_skills(text: str, skill_sections: str) -> List[str]:
+    """Skills listed under "Skills:"-style labels first, then known skills mentioned anywhere."""
+    found = []
+    for items in _SKILL_LIST.findall(skill_sections):
+        found.extend(item.strip(" .") for item in re.split(r",|;", items))
+    found.extend(_SKILL_NAMES[match.group(1).lower()] for match in _SKILL_TERM.finditer(text))
+    skills, seen = [], set()
+    for skill in found:
+        key = skill.lower()
+        if skill and len(skill) <= 40 and key not in seen:
+            seen.add(key)
+            skills.append(skill)
+    return skills[:MAX_SKILLS]
+
+
+@dataclass
+class ResumeProfile:
+    """What the prompts need from a resume, a few hundred tokens instead of the raw extraction."""
+    content_hash: str                  # hash of the text the profile was built from
+    text: str                          # cleaned text without contact details, capped at PROFILE_TEXT_CHARS
+    skills: List[str] = field(default_factory=list)
+    roles: List[str] = field(default_factory=list)
+    years_experience: Optional[float] = None
+    version: int = PROFILE_VERSION
+
+    @classmethod
+    def from_text(cls, raw: str) -> "ResumeProfile":
+        cleaned = clean_resume_text(raw)
+        sections = _sections(cleaned)
+        experience = " ".join(body for header, body in sections.items() if "Experience" in header or header == "Employment History")
+        skill_sections = " ".join(body for header, body in sections.items() if "Skills" in header) or cleaned
+        text = _CONTACT.sub(" ", cleaned)
+        text = re.sub(r"[ |]*\|[ |]*", " | ", text)
+        text = re.sub(r" {2,}", " ", text).strip(" |")
+        if len(text) > PROFILE_TEXT_CHARS:
+            text = text[:PROFILE_TEXT_CHARS].rsplit(" ", 1)[0] + " …"
+        return cls(
+            content_hash=text_hash(raw),
+            text=text,
+            skills=extract_skills(cleaned, skill_sections),
+            roles=extract_roles(experience),
+            years_experience=years_of_experience(experience),
+        )
+
+    def headline(self) -> str:
+        parts = []
+        if self.roles:
+            parts.append(f"Roles: {', '.join(self.roles)}")
+        if self.years_experience is not None:
+            parts.append(f"Experience: {self.years_experience:g} years")
+        if self.skills:
+            parts.append(f"Skills: {', '.join(self.skills)}")
+        return "\n".join(parts)
+
+    def prompt_text(self) -> str:
+        """Headline fields followed by the cleaned resume; what quiz and chat prompts carry."""
+        return "\n".join(part for part in (self.headline(), self.text) if part)
+
+    def summary(self) -> str:
+        """One line of background for prompts that only need the gist, like news searches."""
+        parts = []
+        if self.roles:
+            parts.append(", ".join(self.roles[:3]))
+        if self.years_experience is not None:
+            parts.append(f"{self.years_experience:g} years of experience")
+        if self.skills:
+            parts.append(f"skills: {', '.join(self.skills[:NEWS_SKILLS])}")
+        return "; ".join(parts)
+
+
+class ResumeProfiles:
+    """Resume profiles built once per resume and shared by every prompt that needs one.
+
+    Uploading a resume writes `data/resumes/<user>.profile.json` beside the
+    text. Profiles are cached in memory by content hash, so a user's profile is
+    re-read only when their resume file changes and rebuilt only when its hash
+    (or PROFILE_VERSION) no longer matches the stored one.
+    """
+
+    def __init__(self, resumes_dir: Path = RESUMES_DIR, cache_size: int = PROFILE_CACHE_SIZE):
+        self.resumes_dir = resumes_dir
+        self.cache_size = cache_size
+        self._by_hash: "OrderedDict[str, ResumeProfile]" = OrderedDict()
+        self._by_user: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+        self.builds = 0
+
+    def _resume_file(self, user_id: str) -> Path:
+        return self.resumes_dir / f"{user_id}.txt"
+
+    def _profile_file(self, user_id: str) -> Path:
+        return self.resumes_dir / f"{user_id}.profile.json"
+
+    def _remember(self, key: str, profile: ResumeProfile):
+        # Called with the lock held
+        self._by_hash[key] = profile
+        self._by_hash.move_to_end(key)
+        while len(self._by_hash) > self.cache_size:
+            self._by_hash.popitem(last=False)
+
+    def _cached(self, key: str) -> Optional[ResumeProfile]:
+        with self._lock:
+            profile = self._by_hash.get(key)
+            if profile is not None:
+                self._by_hash.move_to_end(key)
+                self.hits += 1
+            return profile
+
+    def from_text(self, raw: str) -> ResumeProfile:
+        """The profile of a resume text, built at most once per distinct text."""
+        key = text_hash(raw)
+        profile = self._cached(key)
+        if profile is None:
+            profile = ResumeProfile.from_text(raw)
+            with self._lock:
+                self.builds += 1
+                self._remember(key, profile)
+                # Compacting a compacted resume gives it back unchanged
+                self._remember(text_hash(profile.prompt_text()), profile)
+        return profile
+
+    def build(self, user_id: str, raw: str) -> ResumeProfile:
+        """Build and store the profile of a user's resume; called when it is uploaded."""
+        profile = self.from_text(raw)
+        profile_file = self._profile_file(user_id)
+        profile_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = profile_file.with_name(profile_file.name + ".tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(asdict(profile), f)
+        os.replace(tmp, profile_file)
+        return profile
+
+    def get(self, user_id: str) -> Optional[ResumeProfile]:
+        """The user's resume profile, or None if they haven't uploaded a resume."""
+        resume_file = self._resume_file(user_id)
+        try:
+            stat = resume_file.stat()
+        except FileNotFoundError:
+            return None
+        version = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            known = self._by_user.get(user_id)
+        if known is not None and known[0] == version:
+            profile = self._cached(known[1])
+            if profile is not None:
+                return profile
+
+        raw = resume_file.read_text(encoding='utf-8').strip()
+        key = text_hash(raw)
+        profile = self._cached(key)
+        if profile is None:
+            profile = self._load_stored(user_id, key)
+        if profile is None:
+            logger.info(f"Building resume profile for user {user_id}")
+            profile = self.build(user_id, raw)
+        with self._lock:
+            self._by_user[user_id] = (version, key)
+        return profile
+
+    def _load_stored(self, user_id: str, key: str) -> Optional[ResumeProfile]:
+        profile_file = self._profile_file(user_id)
+        if not profile_file.exists():
+            return None
+        try:
+            with open(profile_file, 'r', encoding='utf-8') as f:
+                profile = ResumeProfile(**json.load(f))
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable resume profile {profile_file}: {e}")
+            return None
+        if profile.content_hash != key or profile.version != PROFILE_VERSION:
+            return None
+        with self._lock:
+            self.loads += 1
+            self._remember(key, profile)
+            self._remember(text_hash(profile.prompt_text()), profile)
+        return profile
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'cached_profiles': len(set(map(id, self._by_hash.values()))),
+                'hits': self.hits,
+                'loads': self.loads,
+                'builds': self.builds,
+                'profile_chars': PROFILE_TEXT_CHARS,
+            }
+
+
+resume_profiles = ResumeProfiles()
+
+
+def compact_resume(text: str) -> str:
+    """Any resume text as its compact profile; already-compact text comes back as is."""
+    if not text or not text.strip():
+        return ""
+    return resume_profiles.from_text(text.strip()).prompt_text()
+
+
+def user_resume_profile(user_id: str) -> Optional[ResumeProfile]:
+    try:
+        return resume_profiles.get(user_id)
+    except Exception:
+        logger.exception(f"Could not load the resume profile of user {user_id}")
+        return None
@@ -0,0 +1,158 @@
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from inference import encode_texts
+from resume_profile import RESUMES_DIR, clean_resume_text, user_resume_profile
+from rerank import text_hash
+
+logger = logging.getLogger(__name__)
+
+# MiniLM reads at most 256 word pieces, roughly 150-200 words of resume prose
+CHUNK_WORDS = int(os.getenv("RESUME_CHUNK_WORDS", 120))
+MAX_CHUNKS = int(os.getenv("RESUME_MAX_CHUNKS", 32))
+CACHE_USERS = int(os.getenv("RESUME_VECTOR_CACHE_USERS", 1000))
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def chunk_resume(raw: str, chunk_words: int = CHUNK_WORDS, max_chunks: int = MAX_CHUNKS) -> List[str]:
+    """Resume text in pieces the encoder reads whole: bullets packed together up to `chunk_words` words."""
+    chunks, current = [], []
+    for line in clean_resume_text(raw).split("\n"):
+        words = line.split()
+        while len(words) > chunk_words:
+            if current:
+                chunks.append(" ".join(current))
+                current = []
+            chunks.append(" ".join(words[:chunk_words]))
+            words = words[chunk_words:]
+        if current and len(current) + len(words) > chunk_words:
+            chunks.append(" ".join(current))
+            current = []
+        current.extend(words)
+    if current:
+        chunks.append(" ".join(current))
+    return chunks[:max_chunks]
+
+
+@dataclass
+class ResumeEmbedding:
+    content_hash: str
+    chunks: np.ndarray   # one normalized vector per resume chunk
+    pooled: np.ndarray   # normalized, length-weighted mean of the chunk vectors
+
+    @property
+    def queries(self) -> np.ndarray:
+        """Every vector job search looks up for this resume: the pooled one first, then each chunk."""
+        return np.vstack([self.pooled[None, :], self.chunks])
+
+
+class ResumeVectors:
+    """Resume embeddings computed when the resume is uploaded, so job search needn't encode it.
+
+    The resume is cut into chunks short enough for the bi-encoder to read
+    whole (it truncates at 256 word pieces, which would drop most of a long
+    resume). The chunk vectors and their pooled profile vector are saved as
+    `data/resumes/<user>.vectors.npz`, tagged with the resume's content hash.
+    They are cached in memory and recomputed only for a resume they weren't
+    built from, such as one uploaded before embeddings were stored.
+    """
+
+    def __init__(self, resumes_dir: Path = RESUMES_DIR, cache_users: int = CACHE_USERS):
+        self.resumes_dir = resumes_dir
+        self.cache_users = cache_users
+        self._cache: "OrderedDict[str, ResumeEmbedding]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+        self.builds = 0
+
+    def _vectors_file(self, user_id: str) -> Path:
+        return self.resumes_dir / f"{user_id}.vectors.npz"
+
+    def _remember(self, user_id: str, embedding: ResumeEmbedding):
+        with self._lock:
+            self._cache[user_id] = embedding
+            self._cache.move_to_end(user_id)
+            while len(self._cache) > self.cache_users:
+                self._cache.popitem(last=False)
+
+    def build(self, user_id: str, raw: str) -> Optional[ResumeEmbedding]:
+        """Chunk, embed and store a user's resume; called when it is uploaded."""
+        chunks = chunk_resume(raw)
+        if not chunks:
+            return None
+        chunk_vectors = _normalize(encode_texts(chunks))
+        weights = np.array([len(chunk.split()) for chunk in chunks], dtype='float32')
+        pooled = _normalize((chunk_vectors * weights[:, None]).sum(axis=0))
+        embedding = ResumeEmbedding(text_hash(raw), chunk_vectors, pooled.astype('float32'))
+
+        vectors_file = self._vectors_file(user_id)
+        vectors_file.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=vectors_file.parent, prefix=f".{vectors_file.name}.", delete=False) as f:
+            np.savez(f, content_hash=np.array(embedding.content_hash), chunks=embedding.chunks, pooled=embedding.pooled)
+        os.replace(f.name, vectors_file)
+        with self._lock:
+            self.builds += 1
+        self._remember(user_id, embedding)
+        return embedding
+
+    def _load_stored(self, user_id: str, content_hash: str) -> Optional[ResumeEmbedding]:
+        vectors_file = self._vectors_file(user_id)
+        if not vectors_file.exists():
+            return None
+        try:
+            with np.load(vectors_file) as stored:
+                embedding = ResumeEmbedding(str(stored['content_hash']), stored['chunks'], stored['pooled'])
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable resume vectors {vectors_file}: {e}")
+            return None
+        if embedding.content_hash != content_hash:
+            return None
+        with self._lock:
+            self.loads += 1
+        return embedding
+
+    def get(self, user_id: str) -> Optional[ResumeEmbedding]:
+        """The embedding of the user's current resume, or None if they haven't uploaded one."""
+        profile = user_resume_profile(user_id)
+        if profile is None:
+            return None
+        with self._lock:
+            embedding = self._cache.get(user_id)
+            if embedding is not None and embedding.content_hash == profile.content_hash:
+                self._cache.move_to_end(user_id)
+                self.hits += 1
+                return embedding
+
+        embedding = self._load_stored(user_id, profile.content_hash)
+        if embedding is not None:
+            self._remember(user_id, embedding)
+            return embedding
+        logger.info(f"Embedding resume of user {user_id}")
+        raw = (self.resumes_dir / f"{user_id}.txt").read_text(encoding='utf-8').strip()
+        return self.build(user_id, raw)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'cached_users': len(self._cache),
+                'hits': self.hits,
+                'loads': self.loads,
+                'builds': self.builds,
+                'chunk_words': CHUNK_WORDS,
+            }
+
+
+resume_vectors = ResumeVectors()
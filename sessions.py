@@ -0,0 +1,377 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+SESSIONS_DB = Path("data/sessions.db")
+SESSION_BACKENDS = ("memory", "sqlite", "redis")
+
+logger = logging.getLogger(__name__)
+
+# Rough size of a token in characters for English text; close enough to budget prompts without a tokenizer
+CHARS_PER_TOKEN = 4
+SUMMARY_CHARS = 200
+SUMMARY_LINES = 40
+
+
+@dataclass
+class SessionConfig:
+    """Limits on how many conversations are kept and how long each one may grow."""
+    max_sessions: int = 10000
+    ttl_seconds: float = 6 * 3600   # idle conversations are dropped after this long
+    max_tokens: int = 6000          # history sent to the model is compacted above this
+    keep_turns: int = 6             # most recent user turns kept verbatim when compacting
+    backend: str = "memory"         # memory (one process), sqlite (workers on one host) or redis (several hosts)
+    db_file: str = str(SESSIONS_DB)
+    redis_url: str = "redis://localhost:6379/0"
+
+    @classmethod
+    def from_env(cls) -> "SessionConfig":
+        config = cls(
+            max_sessions=int(os.getenv("SESSION_MAX_SESSIONS", cls.max_sessions)),
+            ttl_seconds=float(os.getenv("SESSION_TTL_SECONDS", cls.ttl_seconds)),
+            max_tokens=int(os.getenv("SESSION_MAX_TOKENS", cls.max_tokens)),
+            keep_turns=int(os.getenv("SESSION_KEEP_TURNS", cls.keep_turns)),
+            backend=os.getenv("SESSION_BACKEND", cls.backend),
+            db_file=os.getenv("SESSION_DB_FILE", cls.db_file),
+            redis_url=os.getenv("SESSION_REDIS_URL", cls.redis_url),
+        )
+        if config.backend not in SESSION_BACKENDS:
+            raise ValueError(f"SESSION_BACKEND must be one of {SESSION_BACKENDS}, got {config.backend!r}")
+        return config
+
+
+def message_tokens(message: Dict[str, Any]) -> int:
+    size = len(message.get("content") or "")
+    for call in message.get("tool_calls") or []:
+        size += len(call["function"]["name"]) + len(call["function"]["arguments"])
+    return size // CHARS_PER_TOKEN + 4
+
+
+def history_tokens(messages: List[Dict[str, Any]]) -> int:
+    return sum(message_tokens(message) for message in messages)
+
+
+def _clip(text: Optional[str]) -> str:
+    text = " ".join((text or "").split())
+    return text if len(text) <= SUMMARY_CHARS else text[:SUMMARY_CHARS] + "…"
+
+
+def compact_history(messages: List[Dict[str, Any]], max_tokens: int, keep_turns: int) -> List[Dict[str, Any]]:
+    """Shrink a history to the token budget, keeping the system prompt and the latest turns.
+
+    Older turns are folded into one summary message listing what the user asked
+    and how the assistant answered (the latest SUMMARY_LINES of them, counting
+    those carried over from earlier compactions); their
+    tool calls and raw tool results are dropped. The history is only cut at user messages, so a tool call is never
+    separated from its results. If the recent turns alone are still over budget,
+    fewer of them are kept.
+    """
+    if history_tokens(messages) <= max_tokens:
+        return messages
+
+    system = [message for message in messages[:1] if message["role"] == "system"]
+    rest = messages[len(system):]
+    # An earlier compaction's summary is carried into the new one
+    summary_lines = []
+    if rest and rest[0]["role"] == "system":
+        summary_lines = rest[0]["content"].split("\n")[1:]
+        rest = rest[1:]
+
+    turn_starts = [i for i, message in enumerate(rest) if message["role"] == "user"]
+    keep = min(keep_turns, len(turn_starts))
+    while True:
+        cut = turn_starts[-keep] if keep else len(rest)
+        old, recent = rest[:cut], rest[cut:]
+        lines = (summary_lines + [
+            f"{'User' if message['role'] == 'user' else 'Assistant'}: {_clip(message['content'])}"
+            for message in old
+            if message["role"] in ("user", "assistant") and message.get("content")
+        ])[-SUMMARY_LINES:]
+        compacted = system + _summary(lines) + recent
+        if history_tokens(compacted) <= max_tokens:
+            return compacted
+        if keep <= 1:
+            # Only the latest turn is left: shorten the summary, oldest lines first
+            while lines and history_tokens(compacted) > max_tokens:
+                lines = lines[1:]
+                compacted = system + _summary(lines) + recent
+            return compacted
+        keep -= 1
+
+
+def _summary(lines: List[str]) -> List[Dict[str, Any]]:
+    return [{"role": "system", "content": "Summary of the earlier conversation:\n" + "\n".join(lines)}] if lines else []
+
+
+class SessionStore(ABC):
+    """Conversation histories with a version number per session.
+
+    `load` returns a history with its version, and `save` only succeeds if the
+    stored version is still the one loaded, so two turns for the same user
+    running at once (in one process or in different workers) can't silently
+    overwrite each other; the loser reloads and reapplies its turn. Saving a
+    history compacts it to the token budget, so each turn sends the model a
+    bounded prompt however long the conversation has run.
+    """
+
+    backend = ""
+
+    def __init__(self, config: SessionConfig):
+        self.config = config
+        self._counter_lock = threading.Lock()
+        self.compactions = 0
+        self.conflicts = 0
+
+    @abstractmethod
+    def load(self, user_id: str) -> Tuple[Optional[List[Dict[str, Any]]], int]:
+        """The user's history, or None if there is no live session, and the version to save against."""
+
+    def save(self, user_id: str, messages: List[Dict[str, Any]], version: int) -> bool:
+        """Store a history if the session is still at `version`; False if another turn saved first."""
+        compacted = compact_history(messages, self.config.max_tokens, self.config.keep_turns)
+        saved = self._write(user_id, compacted, version)
+        with self._counter_lock:
+            self.compactions += compacted is not messages
+            self.conflicts += not saved
+        return saved
+
+    @abstractmethod
+    def _write(self, user_id: str, messages: List[Dict[str, Any]], version: int) -> bool:
+        """Store a history if the session is still at `version`."""
+
+    @abstractmethod
+    def delete(self, user_id: str):
+        """Forget the user's session."""
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'backend': self.backend,
+            'max_sessions': self.config.max_sessions,
+            'max_tokens': self.config.max_tokens,
+            'compactions': self.compactions,
+            'conflicts': self.conflicts,
+            **self._stats(),
+        }
+
+    def _stats(self) -> Dict[str, Any]:
+        return {}
+
+
+class MemorySessionStore(SessionStore):
+    """Sessions in this process, bounded by count and idle time.
+
+    Sessions are kept in least-recently-used order; the oldest are evicted past
+    `max_sessions` and any session idle for `ttl_seconds` is dropped. Only
+    suitable for a single worker.
+    """
+
+    backend = "memory"
+
+    def __init__(self, config: SessionConfig):
+        super().__init__(config)
+        self._sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def load(self, user_id: str) -> Tuple[Optional[List[Dict[str, Any]]], int]:
+        with self._lock:
+            self._expire(time.monotonic())
+            session = self._sessions.get(user_id)
+            if session is None:
+                return None, 0
+            session["touched"] = time.monotonic()
+            self._sessions.move_to_end(user_id)
+            return list(session["messages"]), session["version"]
+
+    def _write(self, user_id: str, messages: List[Dict[str, Any]], version: int) -> bool:
+        size = len(json.dumps(messages))
+        with self._lock:
+            current = self._sessions.get(user_id)
+            if (current["version"] if current else 0) != version:
+                return False
+            now = time.monotonic()
+            self._sessions[user_id] = {"messages": messages, "version": version + 1, "bytes": size, "touched": now}
+            self._sessions.move_to_end(user_id)
+            self._expire(now)
+            while len(self._sessions) > self.config.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evictions += 1
+            return True
+
+    def delete(self, user_id: str):
+        with self._lock:
+            self._sessions.pop(user_id, None)
+
+    def _expire(self, now: float):
+        # Sessions are in last-use order, so expired ones are all at the front
+        while self._sessions:
+            user_id, session = next(iter(self._sessions.items()))
+            if now - session["touched"] < self.config.ttl_seconds:
+                break
+            self._sessions.popitem(last=False)
+            self.expirations += 1
+
+    def _stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'sessions': len(self._sessions),
+                'bytes': sum(session["bytes"] for session in self._sessions.values()),
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
+
+class SQLiteSessionStore(SessionStore):
+    """Sessions in a local SQLite file, shared by every worker process on the host.
+
+    The file runs in WAL mode, and a save is a single conditional UPDATE (or
+    INSERT for a new session) on the version column. Expired and
+    least-recently-used sessions past `max_sessions` are pruned every
+    PRUNE_EVERY saves.
+    """
+
+    backend = "sqlite"
+    PRUNE_EVERY = 200
+
+    def __init__(self, config: SessionConfig):
+        super().__init__(config)
+        self.db_file = Path(config.db_file)
+        self._local = threading.local()
+        self._saves = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            self.db_file.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.db_file, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS sessions (
+                        user_id TEXT PRIMARY KEY,
+                        messages TEXT NOT NULL,
+                        version INTEGER NOT NULL,
+                        touched REAL NOT NULL
+                    )
+                """)
+                conn.execute("CREATE INDEX IF NOT EXISTS sessions_touched ON sessions (touched)")
+            self._local.conn = conn
+        return conn
+
+    def load(self, user_id: str) -> Tuple[Optional[List[Dict[str, Any]]], int]:
+        row = self._connection().execute(
+            "SELECT messages, version, touched FROM sessions WHERE user_id = ?", (user_id,)).fetchone()
+        if row is None:
+            return None, 0
+        messages, version, touched = row
+        # An expired session is gone for the user, but its row is still
+        # there until pruned, so its version is what the next save must match
+        if time.time() - touched >= self.config.ttl_seconds:
+            return None, version
+        return json.loads(messages), version
+
+    def _write(self, user_id: str, messages: List[Dict[str, Any]], version: int) -> bool:
+        conn = self._connection()
+        data = json.dumps(messages)
+        with conn:
+            if version == 0:
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO sessions VALUES (?, ?, 1, ?)", (user_id, data, time.time()))
+            else:
+                cursor = conn.execute(
+                    "UPDATE sessions SET messages = ?, version = version + 1, touched = ? WHERE user_id = ? AND version = ?",
+                    (data, time.time(), user_id, version))
+        with self._counter_lock:
+            self._saves += 1
+            prune = self._saves % self.PRUNE_EVERY == 0
+        if prune:
+            self._prune(conn)
+        return cursor.rowcount == 1
+
+    def _prune(self, conn: sqlite3.Connection):
+        with conn:
+            conn.execute("DELETE FROM sessions WHERE touched < ?", (time.time() - self.config.ttl_seconds,))
+            conn.execute("""
+                DELETE FROM sessions WHERE user_id IN (
+                    SELECT user_id FROM sessions ORDER BY touched DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.config.max_sessions,))
+
+    def delete(self, user_id: str):
+        conn = self._connection()
+        with conn:
+            conn.execute("DELETE FROM sessions WHERE user_id = ?", (user_id,))
+
+    def _stats(self) -> Dict[str, Any]:
+        sessions, size = self._connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(messages)), 0) FROM sessions").fetchone()
+        return {'sessions': sessions, 'bytes': size}
+
+
+# Compare-and-set of a session hash: write only if the stored version matches
+_REDIS_SAVE = """
+if (redis.call('HGET', KEYS[1], 'version') or '0') ~= ARGV[1] then
+    return 0
+end
+redis.call('HSET', KEYS[1], 'messages', ARGV[2], 'version', ARGV[3])
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+return 1
+"""
+
+
+class RedisSessionStore(SessionStore):
+    """Sessions in Redis (or any server speaking its protocol), shared across hosts.
+
+    Each session is a hash holding the messages and version, saved through a
+    compare-and-set script and expiring after `ttl_seconds` idle. Bounding the
+    number of sessions is left to the server's maxmemory eviction policy.
+    Needs `pip install redis`.
+    """
+
+    backend = "redis"
+    KEY_PREFIX = "grapevine:session:"
+
+    def __init__(self, config: SessionConfig):
+        import redis
+
+        super().__init__(config)
+        self.redis = redis.Redis.from_url(config.redis_url)
+        self._save_script = self.redis.register_script(_REDIS_SAVE)
+
+    def _key(self, user_id: str) -> str:
+        return self.KEY_PREFIX + user_id
+
+    def load(self, user_id: str) -> Tuple[Optional[List[Dict[str, Any]]], int]:
+        messages, version = self.redis.hmget(self._key(user_id), "messages", "version")
+        if messages is None:
+            return None, 0
+        self.redis.expire(self._key(user_id), int(self.config.ttl_seconds))
+        return json.loads(messages), int(version)
+
+    def _write(self, user_id: str, messages: List[Dict[str, Any]], version: int) -> bool:
+        saved = self._save_script(
+            keys=[self._key(user_id)],
+            args=[str(version), json.dumps(messages), str(version + 1), int(self.config.ttl_seconds)])
+        return bool(saved)
+
+    def delete(self, user_id: str):
+        self.redis.delete(self._key(user_id))
+
+    def _stats(self) -> Dict[str, Any]:
+        return {'used_memory': self.redis.info("memory").get("used_memory")}
+
+
+def create_session_store(config: SessionConfig) -> SessionStore:
+    store = {"memory": MemorySessionStore, "sqlite": SQLiteSessionStore, "redis": RedisSessionStore}[config.backend](config)
+    logger.info(f"Keeping chat sessions in the {config.backend} backend")
+    return store
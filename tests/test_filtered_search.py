@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+import job_index
+import job_search
+from job_index import IndexConfig
+from vector_store import JobVectorStore
+
+
+@pytest.fixture
+def corpus(tmp_path, monkeypatch):
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((3000, 32)).astype('float32')
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    ids = np.arange(1, len(vectors) + 1, dtype='int64')
+    store = JobVectorStore(tmp_path / "jobs.vectors", tmp_path / "jobs.vector_ids", tmp_path / "jobs.vectors.json")
+    store.append(ids, vectors)
+    monkeypatch.setattr(job_search, "vector_store", store)
+    config = IndexConfig(kind="ivf_flat", nprobe=16)
+    monkeypatch.setattr(job_search, "index_config", config)
+    index = job_index.create_index(vectors, ids, config)
+    assert job_index.index_kind(index) == "ivf_flat" and index.nlist == 76
+    return index, ids, vectors, rng
+
+
+def brute_force(vectors, ids, queries, allowed_ids, k):
+    allowed = np.isin(ids, allowed_ids)
+    scores = queries @ vectors[allowed].T
+    return ids[allowed][np.argsort(-scores, axis=1)[:, :k]]
+
+
+@pytest.mark.parametrize("exact_max", [2000, 0])
+@pytest.mark.parametrize("allowed_count, top_k", [(30, 15), (10, 15), (400, 15)])
+def test_filtered_ivf_search_returns_every_allowed_match(corpus, monkeypatch, exact_max, allowed_count, top_k):
+    index, ids, vectors, rng = corpus
+    monkeypatch.setattr(job_search, "FILTER_EXACT_MAX", exact_max)
+    allowed_ids = np.sort(rng.choice(ids, allowed_count, replace=False))
+    queries = vectors[rng.choice(len(vectors), 3)]
+
+    scores, labels = job_search.filtered_search(index, queries, top_k, allowed_ids)
+
+    expected = min(top_k, allowed_count)
+    assert labels.shape == (3, expected)
+    assert np.isin(labels, allowed_ids).all()
+    np.testing.assert_array_equal(labels, brute_force(vectors, ids, queries, allowed_ids, expected))
+    assert (np.diff(scores, axis=1) <= 1e-6).all()
+
+
+@pytest.mark.parametrize("configured", ["flat", "ivf_flat"])
+def test_read_index_maps_by_stored_kind(corpus, tmp_path, monkeypatch, configured):
+    index, ids, vectors, rng = corpus
+    flat = job_index.create_index(vectors, ids, IndexConfig(kind="flat"))
+    read_flags = []
+    read_index = job_index.faiss.read_index
+
+    def recording_read_index(path, flags=0):
+        read_flags.append(flags)
+        return read_index(path, flags)
+
+    monkeypatch.setattr(job_index.faiss, "read_index", recording_read_index)
+    for stored, expected_flags in ((index, job_index.faiss.IO_FLAG_MMAP), (flat, job_index.faiss.IO_FLAG_MMAP_IFC)):
+        path = tmp_path / f"{job_index.index_kind(stored)}.index"
+        job_index.faiss.write_index(stored, str(path))
+        read_flags.clear()
+        loaded = job_index.read_index(path, IndexConfig(kind=configured))
+        assert read_flags == [expected_flags]
+        assert job_index.index_kind(loaded) == job_index.index_kind(stored)
+        assert loaded.search(vectors[:1], 1)[1][0, 0] == ids[0]
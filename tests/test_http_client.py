@@ -0,0 +1,95 @@
+import asyncio
+import gc
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import http_client
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answers each POST with the next (status, headers) in the server's script, then 200."""
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        with self.server.lock:
+            self.server.arrivals.append(time.monotonic())
+            status, headers = self.server.script.pop(0) if self.server.script else (200, {})
+        body = json.dumps({"attempt": len(self.server.arrivals)}).encode()
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    monkeypatch.setattr(http_client, "BACKOFF_BASE", 0.01)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.lock = threading.Lock()
+    server.arrivals = []
+    server.script = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server, f"http://127.0.0.1:{server.server_address[1]}/chat/completions"
+    server.shutdown()
+    server.server_close()
+
+
+SCRIPT = [(429, {"Retry-After": "0.3"}), (503, {}), (502, {})]
+
+
+def assert_retried(server, response):
+    assert response.status_code == 200
+    assert response.json() == {"attempt": 4}
+    # The 429's Retry-After was honoured before the second attempt
+    assert server.arrivals[1] - server.arrivals[0] >= 0.25
+
+
+def test_post_json_retries_429_and_5xx(stub):
+    server, url = stub
+    server.script = list(SCRIPT)
+    assert_retried(server, http_client.post_json(url, {"q": 1}))
+
+
+def test_apost_json_retries_429_and_5xx(stub):
+    server, url = stub
+    server.script = list(SCRIPT)
+
+    async def post():
+        try:
+            return await http_client.apost_json(url, {"q": 1})
+        finally:
+            await http_client.aclose_clients()
+
+    assert_retried(server, asyncio.run(post()))
+
+
+def test_last_error_response_is_returned(stub):
+    server, url = stub
+    server.script = [(503, {})] * 3
+    response = http_client.post_json(url, {"q": 1}, max_retries=2)
+    assert response.status_code == 503 and len(server.arrivals) == 3
+
+
+def test_async_clients_go_with_their_loop():
+    async def open_client():
+        return http_client.get_async_client()
+
+    loop = asyncio.new_event_loop()
+    client = loop.run_until_complete(open_client())
+    assert http_client._async_clients.get(loop) is client
+    loop.run_until_complete(client.aclose())
+    loop.close()
+    del loop
+    gc.collect()
+    assert len(http_client._async_clients) == 0
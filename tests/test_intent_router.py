@@ -0,0 +1,62 @@
+import pytest
+
+from intent_router import IntentRouter, match_keywords
+
+# Labelled messages: the tool and arguments the keyword rules should produce, or
+# None where the model has to decide. Add misroutes seen in real traffic here.
+LABELLED = [
+    ("Find me remote data science jobs in Berlin",
+     ("find_jobs", {"query": "data science", "remote_only": True, "location": "Berlin"})),
+    ("Find me remote backend engineering jobs", ("find_jobs", {"query": "backend engineering", "remote_only": True})),
+    ("find me jobs in London", ("find_jobs", {"location": "London"})),
+    ("Can you please show me some backend engineering roles paying over 150k",
+     ("find_jobs", {"query": "backend engineering", "min_salary": 150000.0})),
+    ("Thanks! Find me ML jobs posted this week", ("find_jobs", {"query": "ML", "posted_within_days": 7})),
+    ("quiz me on SQL", ("fetch_quiz_questions", {"role": "SQL"})),
+    ("Prepare me for a backend engineer interview", ("fetch_quiz_questions", {"role": "backend engineer"})),
+    ("Can you give me interview questions for product manager",
+     ("fetch_quiz_questions", {"role": "product manager"})),
+    ("news about AI hiring", ("search_job_news", {"topic": "AI hiring"})),
+    ("Tell me the latest news on AI hiring", ("search_job_news", {"topic": "AI hiring"})),
+    ("What's happening in the data science job market?", ("search_job_news", {"topic": "data science job market"})),
+    # Questions and advice
+    ("How do I get a job in data science?", None),
+    ("Recommend some courses for product manager roles", None),
+    ("how can I get promoted to senior roles", None),
+    ("Should I look for jobs in Germany or stay?", None),
+    ("I want to find a job", None),
+    # Mentions that aren't requests
+    ("I read news about layoffs at Google, should I be worried about my job?", None),
+    ("What's happening with my application?", None),
+    ("What's new in my resume that I should update?", None),
+    # Several requests in one message
+    ("Find me jobs in New York and quiz me on SQL", None),
+    ("Tell me the latest trends in hiring and then find me jobs", None),
+    ("I want to test me on Python and also find jobs", None),
+    # Constraints the tool arguments can't express
+    ("show me jobs not in California", None),
+    ("Find jobs that don't require a degree", None),
+    ("search for product manager positions in New York or Boston", None),
+    # Arguments that aren't a query, or that point back into the conversation
+    ("Find me 10 jobs", None),
+    ("show me more jobs like that", None),
+    ("quiz me on it", None),
+]
+
+
+@pytest.mark.parametrize("text, expected", LABELLED)
+def test_labelled_messages(text, expected):
+    intent = match_keywords(text)
+    routed = (intent.tool, intent.args) if intent else None
+    assert routed == expected
+
+
+def test_precision_on_labelled_set():
+    routed = [(match_keywords(text), expected) for text, expected in LABELLED]
+    taken = [(intent, expected) for intent, expected in routed if intent is not None]
+    correct = [1 for intent, expected in taken if expected == (intent.tool, intent.args)]
+    assert taken and len(correct) == len(taken)
+
+
+def test_off_routes_nothing():
+    assert IntentRouter(mode="off").route("quiz me on SQL") is None
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import job_search
+from job_index import IndexConfig
+from vector_store import FileLock, JobVectorStore
+
+
+def fake_encode(texts):
+    rng = np.random.default_rng(len(texts))
+    vectors = rng.standard_normal((len(texts), 16)).astype('float32')
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    monkeypatch.setattr(job_search, "JOBS_FILE", tmp_path / "jobs.csv")
+    monkeypatch.setattr(job_search, "JOBS_INDEX_FILE", tmp_path / "jobs.index")
+    monkeypatch.setattr(job_search, "index_lock", FileLock(tmp_path / "jobs.index.lock"))
+    monkeypatch.setattr(job_search, "index_config", IndexConfig(kind="flat"))
+    monkeypatch.setattr(job_search, "encode_job_texts", fake_encode)
+    monkeypatch.setattr(job_search, "vector_store", JobVectorStore(
+        tmp_path / "jobs.vectors", tmp_path / "jobs.vector_ids", tmp_path / "jobs.vectors.json"))
+    return job_search.JobSearchEngine()
+
+
+def job(job_id, title="Data Engineer"):
+    return {'job_id': job_id, 'job_title': title, 'description': 'Build pipelines', 'requirements': 'Python'}
+
+
+def test_remove_job_with_numeric_id(engine):
+    engine.add_jobs([job(101), job(102, "Analyst")])
+    assert engine.remove_job("101")
+    assert list(pd.read_csv(job_search.JOBS_FILE, dtype=str)['job_id']) == ["102"]
+    assert len(engine) == 1 and engine.index.ntotal == 1
+    assert not engine.remove_job("101")
+    assert engine.remove_job(102)
+    assert len(engine) == 0
+
+
+def test_add_jobs_rejects_duplicates_within_a_batch(engine):
+    with pytest.raises(ValueError, match="more than once"):
+        engine.add_jobs([job("a"), job("b"), job("a")])
+    assert not job_search.JOBS_FILE.exists()
+    engine.add_jobs([job("a")])
+    with pytest.raises(ValueError, match="already exists"):
+        engine.add_jobs([job("a")])
@@ -0,0 +1,31 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import quiz_history as quiz_history_module
+from quiz_history import QuizHistory
+
+
+def test_concurrent_sidecar_writes_dont_collide(tmp_path, monkeypatch):
+    monkeypatch.setattr(quiz_history_module, "encode_texts",
+                        lambda texts: np.ones((len(texts), 8), dtype='float32'))
+    users = [f"u{i}" for i in range(20)]
+    for user_id in users:
+        QuizHistory(tmp_path).record(user_id, [f"Question {i}?" for i in range(50)])
+
+    writers = 8
+    barrier = threading.Barrier(writers)
+
+    def encode_history(user_id):
+        # Separate caches, as in separate workers, so every thread writes the sidecar
+        history = QuizHistory(tmp_path)
+        entry = history._load(user_id)
+        barrier.wait()
+        return history._vectors(user_id, entry).shape
+
+    with ThreadPoolExecutor(max_workers=writers) as executor:
+        for user_id in users:
+            assert set(executor.map(encode_history, [user_id] * writers)) == {(50, 8)}
+            assert np.load(tmp_path / f"{user_id}.vectors.npy").shape == (50, 8)
+    assert sorted(path.suffix for path in tmp_path.iterdir()) == ['.csv'] * 20 + ['.npy'] * 20
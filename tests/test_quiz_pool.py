@@ -0,0 +1,72 @@
+import threading
+
+import numpy as np
+import pytest
+
+import quiz_history as quiz_history_module
+import quiz_pool as quiz_pool_module
+from quiz_history import quiz_history
+from quiz_pool import QuizPool
+
+
+DIMENSIONS = {}
+
+
+def fake_encode(texts):
+    # Texts equal up to case and spacing count as the same question
+    vectors = np.zeros((len(texts), 256), dtype='float32')
+    for row, text in enumerate(texts):
+        key = " ".join(text.lower().split())
+        vectors[row, DIMENSIONS.setdefault(key, len(DIMENSIONS) % 256)] = 1.0
+    return vectors
+
+
+@pytest.fixture
+def api_calls(tmp_path, monkeypatch):
+    monkeypatch.setattr(quiz_history, "quiz_dir", tmp_path)
+    monkeypatch.setattr(quiz_history_module, "encode_texts", fake_encode)
+    calls = []
+    lock = threading.Lock()
+
+    def request_quiz_questions(user_id, resume, role, past_questions=None, count=5):
+        with lock:
+            calls.append(count)
+            start = 100 * len(calls)
+        return [f"Question {start + i}?" for i in range(count)]
+
+    monkeypatch.setattr(quiz_pool_module, "request_quiz_questions", request_quiz_questions)
+    return calls
+
+
+def test_miss_is_served_by_the_single_refill(api_calls):
+    pool = QuizPool(size=15, low_water=5, refill_workers=1)
+    taken = pool.take("u1", "Data Engineer", "resume", count=5)
+    assert taken == [f"Question {100 + i}?" for i in range(5)]
+    assert api_calls == [10]
+    assert pool.stats()['pooled_questions'] == 5
+
+    assert pool.take("u1", "data engineer", "resume", count=5) == [f"Question {105 + i}?" for i in range(5)]
+    stats = pool.stats()
+    assert (stats['hits'], stats['misses'], stats['refill_waits']) == (1, 1, 1)
+
+
+def test_pooled_near_duplicates_of_history_are_dropped(api_calls):
+    pool = QuizPool(size=15, low_water=0, refill_workers=1)
+    pool.take("u1", "Data Engineer", "resume", count=5)
+    # Asked elsewhere since the pool was filled, worded slightly differently
+    quiz_history.record("u1", ["question  105?", "QUESTION 106?"])
+
+    taken = pool.take("u1", "Data Engineer", "resume", count=3, wait_seconds=0)
+    assert taken == ["Question 107?", "Question 108?", "Question 109?"]
+
+
+def test_failed_refill_returns_none_without_retrying(api_calls, monkeypatch):
+    def failing(*args, **kwargs):
+        api_calls.append("failed")
+        raise quiz_pool_module.QuizGenerationError(["Error"])
+
+    monkeypatch.setattr(quiz_pool_module, "request_quiz_questions", failing)
+    pool = QuizPool(size=15, low_water=5, refill_workers=1)
+    assert pool.take("u1", "Data Engineer", "resume", count=5) is None
+    assert api_calls == ["failed"]
+    assert pool.stats()['refilling'] == 0
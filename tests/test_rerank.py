@@ -0,0 +1,34 @@
+from rerank import CascadeReranker, RerankConfig
+
+
+def reranker(**config):
+    calls = []
+
+    def predict(pairs):
+        calls.append(pairs)
+        # The cross-encoder prefers longer job texts
+        return [float(len(text)) for _, text in pairs]
+
+    return CascadeReranker(predict, RerankConfig(**config)), calls
+
+
+def test_pool_smaller_than_top_k_is_scored():
+    cascade, calls = reranker(mode="cascade")
+    order, scores = cascade.rerank("python", ["a", "b", "c"], ["x", "xxx", "xx"], [0.9, 0.5, 0.1], top_k=10)
+    assert len(calls) == 1
+    assert order == [1, 2, 0]
+    assert scores == {0: 1.0, 1: 3.0, 2: 2.0}
+
+
+def test_clear_margin_skips_cross_encoder():
+    cascade, calls = reranker(mode="cascade", margin=0.1)
+    order, scores = cascade.rerank("python", ["a", "b", "c"], ["x", "xxx", "xx"], [0.9, 0.8, 0.3], top_k=2)
+    assert calls == []
+    assert order == [0, 1, 2] and scores == {}
+
+
+def test_close_margin_scores_candidates():
+    cascade, calls = reranker(mode="cascade", margin=0.1, candidates=2)
+    order, scores = cascade.rerank("python", ["a", "b", "c"], ["x", "xxx", "xx"], [0.9, 0.85, 0.8], top_k=1)
+    assert order == [1, 0, 2]
+    assert set(scores) == {0, 1}
@@ -0,0 +1,56 @@
+import multiprocessing
+
+import numpy as np
+
+from vector_store import FileLock, JobVectorStore
+
+
+def _store(directory):
+    return JobVectorStore(directory / "jobs.vectors", directory / "jobs.vector_ids", directory / "jobs.vectors.json")
+
+
+def _append_rows(directory, writer, batches):
+    store = _store(directory)
+    for batch in range(batches):
+        ids = np.arange(8, dtype='int64') + writer * 1_000_000 + batch * 8
+        # Every component of a row holds its id, so a torn write shows up as a mismatch
+        store.append(ids, np.repeat(ids[:, None].astype('float32'), 4, axis=1))
+
+
+def _hold_lock(path, locked, release):
+    with FileLock(path):
+        locked.set()
+        release.wait(10)
+
+
+def test_concurrent_appends_keep_rows_aligned(tmp_path):
+    ctx = multiprocessing.get_context('spawn')
+    writers = [ctx.Process(target=_append_rows, args=(tmp_path, writer, 50)) for writer in range(4)]
+    for process in writers:
+        process.start()
+    for process in writers:
+        process.join(30)
+        assert process.exitcode == 0
+
+    ids, vectors = _store(tmp_path).load()
+    assert len(ids) == 4 * 50 * 8
+    assert (tmp_path / "jobs.vectors").stat().st_size == len(ids) * 4 * 4
+    assert np.array_equal(vectors, np.repeat(ids[:, None].astype('float32'), 4, axis=1))
+
+
+def test_file_lock_excludes_other_processes(tmp_path):
+    ctx = multiprocessing.get_context('spawn')
+    locked, release = ctx.Event(), ctx.Event()
+    holder = ctx.Process(target=_hold_lock, args=(tmp_path / "index.lock", locked, release))
+    holder.start()
+    try:
+        assert locked.wait(10)
+        lock = FileLock(tmp_path / "index.lock")
+        assert not lock.acquire(blocking=False)
+    finally:
+        release.set()
+        holder.join(10)
+    assert lock.acquire(blocking=False)
+    assert lock.acquire(blocking=False)
+    lock.release()
+    lock.release()
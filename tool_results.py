@@ -0,0 +1,95 @@
+import json
+import math
+import os
+import threading
+from typing import Any, Callable, Dict, List
+
+# Job fields the model sees; scores, requirements and the rest stay with the raw result
+JOB_PROMPT_FIELDS = ['job_id', 'job_title', 'company', 'location', 'salary', 'posting_date', 'job_link']
+JOB_DESCRIPTION_CHARS = int(os.getenv("TOOL_RESULT_DESCRIPTION_CHARS", 200))
+NEWS_CHARS = int(os.getenv("TOOL_RESULT_NEWS_CHARS", 3000))
+QUESTION_CHARS = 300
+
+
+def clean(value: Any) -> Any:
+    """Make a tool result JSON-safe: NaN becomes null and non-JSON types become strings."""
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if isinstance(value, dict):
+        return {key: clean(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [clean(item) for item in value]
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+def truncate(text: str, max_chars: int) -> str:
+    text = " ".join(str(text).split())
+    return text if len(text) <= max_chars else text[:max_chars].rstrip() + "…"
+
+
+def compact_json(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def format_jobs(jobs: List[Dict[str, Any]]) -> str:
+    projected = []
+    for job in jobs:
+        entry = {field: job[field] for field in JOB_PROMPT_FIELDS if job.get(field) not in (None, "")}
+        if job.get('description'):
+            entry['summary'] = truncate(job['description'], JOB_DESCRIPTION_CHARS)
+        projected.append(entry)
+    return compact_json(clean(projected))
+
+
+def format_questions(questions: List[str]) -> str:
+    return compact_json([truncate(question, QUESTION_CHARS) for question in questions])
+
+
+def format_news(answer: str) -> str:
+    return truncate(answer, NEWS_CHARS) if isinstance(answer, str) else compact_json(clean(answer))
+
+
+FORMATTERS: Dict[str, Callable[[Any], str]] = {
+    "find_jobs": format_jobs,
+    "fetch_quiz_questions": format_questions,
+    "search_job_news": format_news,
+}
+
+_lock = threading.Lock()
+_stats: Dict[str, Dict[str, int]] = {}
+
+
+def format_tool_result(func_name: str, result: Any) -> str:
+    """The text of a tool result as it goes into the prompt.
+
+    Each tool's formatter keeps only what the model needs to answer and
+    follow-ups (job listings without scores or requirements, news cut to
+    NEWS_CHARS) as compact JSON; the full result is still handed to the UI.
+    Bytes before and after are counted per tool for /metrics.
+    """
+    formatter = FORMATTERS.get(func_name)
+    try:
+        content = formatter(result) if formatter else str(result)
+    except Exception:
+        # An unexpected shape (an error string, say) goes in as it was
+        content = str(result)
+
+    raw_bytes = len(str(result).encode('utf-8'))
+    prompt_bytes = len(content.encode('utf-8'))
+    with _lock:
+        counts = _stats.setdefault(func_name, {'calls': 0, 'raw_bytes': 0, 'prompt_bytes': 0})
+        counts['calls'] += 1
+        counts['raw_bytes'] += raw_bytes
+        counts['prompt_bytes'] += prompt_bytes
+    return content
+
+
+def stats() -> Dict[str, Dict[str, Any]]:
+    """Per tool: calls, bytes of the old str() form, bytes actually put in the prompt, and the share saved."""
+    with _lock:
+        return {
+            name: {**counts, 'saved_ratio': 1 - counts['prompt_bytes'] / counts['raw_bytes'] if counts['raw_bytes'] else 0.0}
+            for name, counts in _stats.items()
+        }
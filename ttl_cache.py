@@ -0,0 +1,168 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+_refresh_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="cache-refresh")
+
+
+class TTLCache:
+    """Size-bounded LRU cache with expiry, single-flight loading and stale-while-revalidate.
+
+    A value is fresh for `ttl` seconds. For `stale_ttl` seconds after that it
+    is still served at once while one background load refreshes it; past that
+    the caller loads it again. Concurrent misses for the same key share a single
+    load, whether the callers are threads (`get_or_load`) or coroutines
+    (`aget_or_load`). Failed loads, and values `cacheable` rejects, are handed to
+    the callers waiting on them but never stored.
+    """
+
+    def __init__(self, name: str, max_size: int, ttl: float, stale_ttl: float = 0.0,
+                 cacheable: Callable[[Any], bool] = lambda value: True):
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.cacheable = cacheable
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._in_flight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self._background: Set[asyncio.Task] = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.refreshes = 0
+        self.errors = 0
+
+    def _lookup(self, key: Hashable):
+        """(value, state) with state "fresh", "stale" or "miss"; called with the lock held."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None, "miss"
+        value, loaded_at = entry
+        age = time.monotonic() - loaded_at
+        if age < self.ttl:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value, "fresh"
+        if age < self.ttl + self.stale_ttl:
+            self._entries.move_to_end(key)
+            self.stale_hits += 1
+            return value, "stale"
+        del self._entries[key]
+        return None, "miss"
+
+    def _claim(self, key: Hashable):
+        """The in-flight load for key and whether this caller must run it; called with the lock held."""
+        future = self._in_flight.get(key)
+        if future is not None:
+            return future, False
+        future = Future()
+        self._in_flight[key] = future
+        return future, True
+
+    def _finish(self, key: Hashable, future: Future, value: Any = None, error: Optional[BaseException] = None):
+        with self._lock:
+            self._in_flight.pop(key, None)
+            if error is None and self.cacheable(value):
+                self._entries[key] = (value, time.monotonic())
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+            elif error is not None:
+                self.errors += 1
+        if error is None:
+            future.set_result(value)
+        else:
+            future.set_exception(error)
+
+    def _load(self, key: Hashable, future: Future, loader: Callable[[], Any]):
+        try:
+            value = loader()
+        except Exception as e:
+            logger.warning(f"{self.name} cache load for {key!r} failed: {e}")
+            self._finish(key, future, error=e)
+        else:
+            self._finish(key, future, value)
+
+    async def _aload(self, key: Hashable, future: Future, loader: Callable[[], Awaitable[Any]]):
+        try:
+            value = await loader()
+        except asyncio.CancelledError as e:
+            self._finish(key, future, error=e)
+            raise
+        except Exception as e:
+            logger.warning(f"{self.name} cache load for {key!r} failed: {e}")
+            self._finish(key, future, error=e)
+        else:
+            self._finish(key, future, value)
+
+    def _start_aload(self, key: Hashable, future: Future, loader: Callable[[], Awaitable[Any]]):
+        # The load runs as its own task, so cancelling whichever caller started
+        # it doesn't cancel it for everyone else; the reference keeps it from
+        # being garbage collected mid-flight
+        task = asyncio.get_running_loop().create_task(self._aload(key, future, loader))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        with self._lock:
+            value, state = self._lookup(key)
+            if state == "fresh":
+                return value
+            future, leader = self._claim(key)
+            if state == "stale":
+                if leader:
+                    self.refreshes += 1
+                    _refresh_executor.submit(self._load, key, future, loader)
+                return value
+            if leader:
+                self.misses += 1
+            else:
+                self.coalesced += 1
+        if leader:
+            self._load(key, future, loader)
+        return future.result()
+
+    async def aget_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        with self._lock:
+            value, state = self._lookup(key)
+            if state == "fresh":
+                return value
+            future, leader = self._claim(key)
+            if state == "stale":
+                if leader:
+                    self.refreshes += 1
+                    self._start_aload(key, future, loader)
+                return value
+            if leader:
+                self.misses += 1
+                self._start_aload(key, future, loader)
+            else:
+                self.coalesced += 1
+        # shield: a caller being cancelled must not cancel the shared load
+        return await asyncio.shield(asyncio.wrap_future(future))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses + self.coalesced
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl,
+                'stale_ttl_seconds': self.stale_ttl,
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'refreshes': self.refreshes,
+                'errors': self.errors,
+                'hit_ratio': (self.hits + self.stale_hits + self.coalesced) / lookups if lookups else 0.0,
+                'in_flight': len(self._in_flight),
+            }
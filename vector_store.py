@@ -0,0 +1,167 @@
+import fcntl
+import json
+import os
+import sys
+import threading
+from pathlib import Path
+from typing import Iterable, Tuple
+
+import numpy as np
+
+VECTORS_FILE = Path("data/jobs.vectors")
+VECTOR_IDS_FILE = Path("data/jobs.vector_ids")
+VECTORS_META_FILE = Path("data/jobs.vectors.json")
+
+
+class FileLock:
+    """Exclusive lock held across processes with flock(2) on a lock file.
+
+    Threads of one process share the flock, so a thread lock serializes them
+    first. The lock is re-entrant: a writer holding it can call helpers that
+    take it again.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+
+    def acquire(self, blocking: bool = True) -> bool:
+        if not self._thread_lock.acquire(blocking):
+            return False
+        if self._depth == 0:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BaseException:
+                    os.close(fd)
+                    raise
+            except BlockingIOError:
+                self._thread_lock.release()
+                return False
+            except BaseException:
+                self._thread_lock.release()
+                raise
+            self._fd = fd
+        self._depth += 1
+        return True
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+        self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class JobVectorStore:
+    """Append-only store of job embeddings kept as raw files that can be memory-mapped.
+
+    `jobs.vectors` is a float32 matrix with one row per write and `jobs.vector_ids`
+    holds the matching int64 job vector ids. An updated job is appended again, and
+    the last row for an id wins. Readers map both files read-only, so every process
+    on the host shares one page-cache copy.
+    """
+
+    def __init__(self, vectors_file: Path = VECTORS_FILE, ids_file: Path = VECTOR_IDS_FILE,
+                 meta_file: Path = VECTORS_META_FILE):
+        self.vectors_file = vectors_file
+        self.ids_file = ids_file
+        self.meta_file = meta_file
+        # Held by writers so appends and compaction from different processes don't interleave
+        self.lock = FileLock(vectors_file.with_name(vectors_file.name + ".lock"))
+
+    @property
+    def dimension(self) -> int:
+        if not self.meta_file.exists():
+            return 0
+        with open(self.meta_file, 'r') as f:
+            return json.load(f)['dimension']
+
+    def __len__(self) -> int:
+        if not self.ids_file.exists():
+            return 0
+        return self.ids_file.stat().st_size // 8
+
+    def append(self, vector_ids: np.ndarray, vectors: np.ndarray):
+        vectors = np.ascontiguousarray(vectors, dtype='float32')
+        vector_ids = np.ascontiguousarray(vector_ids, dtype='int64')
+        if not len(vector_ids):
+            return
+        with self.lock:
+            if not self.meta_file.exists():
+                self.meta_file.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.meta_file, 'w') as f:
+                    json.dump({'dimension': int(vectors.shape[1])}, f)
+            elif vectors.shape[1] != self.dimension:
+                raise ValueError(f"Vector dimension {vectors.shape[1]} does not match store dimension {self.dimension}")
+
+            # Vectors first: the id count decides how many rows are valid, so a
+            # crash between the two writes only leaves unreferenced vector bytes.
+            count = len(self)
+            with open(self.vectors_file, 'ab') as f:
+                f.truncate(count * self.dimension * 4)
+                f.write(vectors.tobytes())
+            with open(self.ids_file, 'ab') as f:
+                f.write(vector_ids.tobytes())
+
+    def load(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Memory-map the ids and vectors read-only. Returns (ids, vectors)."""
+        count = len(self)
+        dimension = self.dimension
+        if not count:
+            return np.empty(0, dtype='int64'), np.empty((0, dimension), dtype='float32')
+        ids = np.memmap(self.ids_file, dtype='int64', mode='r', shape=(count,))
+        vectors = np.memmap(self.vectors_file, dtype='float32', mode='r', shape=(count, dimension))
+        return ids, vectors
+
+    def latest(self, keep_ids: Iterable[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the newest vector per id, optionally limited to keep_ids."""
+        ids, vectors = self.load()
+        if not len(ids):
+            return ids, vectors
+        unique_ids, first_in_reversed = np.unique(ids[::-1], return_index=True)
+        rows = len(ids) - 1 - first_in_reversed
+        if keep_ids is not None:
+            keep = np.isin(unique_ids, np.fromiter(keep_ids, dtype='int64'))
+            unique_ids, rows = unique_ids[keep], rows[keep]
+        order = np.sort(rows)
+        return np.asarray(ids[order]), np.asarray(vectors[order])
+
+    def compact(self, keep_ids: Iterable[int] = None) -> int:
+        """Rewrite the store with one row per live id. Returns the number of rows kept."""
+        with self.lock:
+            ids, vectors = self.latest(keep_ids)
+            for path, data in ((self.vectors_file, vectors), (self.ids_file, ids)):
+                tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+                with open(tmp_path, 'wb') as f:
+                    f.write(np.ascontiguousarray(data).tobytes())
+                os.replace(tmp_path, path)
+            return len(ids)
+
+
+if __name__ == "__main__":
+    import job_search
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    store = JobVectorStore()
+    if command == "rebuild":
+        index = job_search.build_job_index()
+        print(f"Rebuilt index with {index.ntotal if index is not None else 0} jobs from stored vectors")
+    elif command == "compact":
+        engine = job_search.get_engine()
+        engine.refresh()
+        print(f"Compacted vector store to {store.compact(engine.row_by_vector_id)} rows")
+    else:
+        print(f"{len(store)} stored vectors of dimension {store.dimension}")